@@ -1,8 +1,11 @@
 
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import asyncio
 import logging
 import os
+import sys
 from dotenv import load_dotenv
+from driver import BLOCKED_RESOURCE_TYPES, BLOCKED_HOSTS
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,46 +18,61 @@ logging.basicConfig(
 )
 logger = logging.getLogger('playwright_debug')
 
+# PW_DEBUG=1 shows the browser, slows it down and logs page traffic
+DEBUG = bool(os.getenv("PW_DEBUG"))
+
+# Present once the pool page has rendered: the Picks tab when logged in, the invite row when not
+LOGIN_STATE_SELECTOR = 'a[role="tab"]:has-text("Picks"), div[role="tablist"] a:has-text("Picks"), div.invite-row'
+
+# Evaluated in the page: the invite row (login page), the Picks navigation tab
+# and the user name in the header, all returned in a single round trip
+LOGIN_STATE_JS = """() => {
+    const hasText = (selector, text) => [...document.querySelectorAll(selector)]
+        .some(el => el.textContent.toLowerCase().includes(text.toLowerCase()));
+    return {
+        invite_row: document.querySelector('div.invite-row') !== null,
+        tabs_exist: hasText('a[role="tab"], div[role="tablist"] a', 'Picks'),
+        user_found: hasText('span.MuiTypography-noWrap', 'Grace Raper'),
+    };
+}"""
+
 def log_event(message):
     logger.info(message)
 
-def verify_login(page):
+async def block_nonessential(route):
+    """Abort images, fonts, media, stylesheets and ad requests; let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+async def verify_login(page, screenshot_path="login_verification.png"):
     """
     Verify that the login was successful by checking for specific elements on the page.
     Returns True if login is verified, False otherwise.
     """
     try:
-        # Wait a bit for the page to fully render
-        page.wait_for_timeout(2000)
-        
         # Take a screenshot for verification
         log_event("Taking screenshot for verification")
-        page.screenshot(path="login_verification.png")
+        await page.screenshot(path=screenshot_path)
         
-        # First, check if we're on the login page with Sign Up/Log In buttons
-        log_event("Checking if we're on a login page")
+        # Probe the page for every login signal in a single round trip
+        log_event("Checking page for login signals")
+        state = await page.evaluate(LOGIN_STATE_JS)
         
         # Check for the invite-row which appears on the login page
-        invite_row = page.query_selector('div.invite-row')
-        if invite_row:
+        if state["invite_row"]:
             log_event("ERROR: Found invite-row element - this is the login page")
             return False
             
         # Look for navigation tabs (Picks, Standings, Players)
-        log_event("Checking for navigation tabs")
-        tabs_exist = (
-            page.query_selector('a[role="tab"]:has-text("Picks")') is not None or
-            page.query_selector('div[role="tablist"] a:has-text("Picks")') is not None
-        )
-        
-        if not tabs_exist:
+        if not state["tabs_exist"]:
             log_event("ERROR: Navigation tabs not found - login may have failed")
             return False
         
         # Check for user name in the header (indicates logged in state)
-        log_event("Checking for user name in header")
-        user_element = page.query_selector('span.MuiTypography-noWrap:has-text("Grace Raper")')
-        if user_element:
+        if state["user_found"]:
             log_event("SUCCESS: Found user name in header - definitely logged in")
         else:
             log_event("WARNING: Could not find user name in header, but navigation tabs exist")
@@ -67,50 +85,120 @@ def verify_login(page):
         log_event(f"ERROR during login verification: {str(e)}")
         return False
 
-def main():
-    log_event("Starting Playwright session to check saved login state")
-    with sync_playwright() as p:
-        log_event("Launching browser")
-        browser = p.chromium.launch(headless=False, slow_mo=200)
-        
-        log_event("Creating new browser context with saved storage state")
-        context = browser.new_context(storage_state="cbs_storage.json")
-        
-        # Create a new page without verbose network event listeners
-        page = context.new_page()
+class SessionChecker:
+    """
+    Keep one browser and context alive across login verifications.
+    
+    Use as an async context manager and call verify() once per URL; the
+    browser is only launched on enter. On a clean exit with every check
+    passing, the context's storage state is written back so refreshed
+    cookies carry over to the next run.
+    """
+    
+    def __init__(self, storage_state="cbs_storage.json"):
+        self.storage_state = storage_state
+        self.all_verified = True
+        self._playwright = None
+        self._browser = None
+        self._context = None
+    
+    async def __aenter__(self):
+        self._playwright = await async_playwright().start()
+        try:
+            log_event("Launching browser")
+            # Headless with no artificial delay unless overridden for manual debugging
+            self._browser = await self._playwright.chromium.launch(
+                headless=os.getenv("PW_HEADLESS", "0" if DEBUG else "1") == "1",
+                slow_mo=int(os.getenv("PW_SLOWMO", "200" if DEBUG else "0"))
+            )
+            
+            # One context is shared by every page; they all use the same saved login
+            log_event("Creating new browser context with saved storage state")
+            self._context = await self._browser.new_context(storage_state=self.storage_state)
+            self._context.set_default_navigation_timeout(15000)
+            await self._context.route("**/*", block_nonessential)
+        except Exception:
+            await self._playwright.stop()
+            raise
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None and self.all_verified:
+                log_event(f"Saving storage state to {self.storage_state}")
+                await self._context.storage_state(path=self.storage_state)
+            log_event("Closing browser")
+            await self._browser.close()
+        finally:
+            await self._playwright.stop()
+    
+    async def verify(self, target_url, screenshot_path="login_verification.png"):
+        """Open target_url in a new page of the shared context and verify the login state"""
+        page = await self._context.new_page()
         
-        # # Only log console errors which might be important
-        # page.on("console", lambda msg: log_event(f"Console {msg.type}: {msg.text}") if msg.type == "error" else None)
+        # Per-request listeners call back into Python for every subresource, so only attach them when debugging
+        if DEBUG:
+            page.on("request", lambda request: logger.info("Request: %s %s", request.method, request.url))
+            page.on("response", lambda response: logger.info("Response: %s %s", response.status, response.url))
+            page.on("console", lambda msg: logger.info("Console %s: %s", msg.type, msg.text) if msg.type == "error" else None)
         
-        # Navigate to the CBS Sports Pickem pool URL from environment variables
-        target_url = os.getenv("CBS_POOL_URL")
-        if not target_url:
-            log_event("ERROR: CBS_POOL_URL environment variable not found")
-            print("❌ Error: CBS_POOL_URL not found in .env file")
-            print("   Please make sure you have set CBS_POOL_URL in your .env file")
-            return
+        try:
+            # Return as soon as the response commits; the selector wait below gates on the DOM
+            log_event(f"Navigating to: {target_url}")
+            await page.goto(target_url, wait_until="commit")
+            
+            # Wait for either login signal instead of networkidle, which never settles with dynamic ads
+            log_event("Waiting for page to load...")
+            try:
+                await page.wait_for_selector(LOGIN_STATE_SELECTOR, state="attached", timeout=10000)
+            except PlaywrightTimeoutError:
+                log_event("WARNING: Page did not show the Picks tab or the invite row within 10 seconds")
             
-        log_event(f"Navigating to: {target_url}")
-        page.goto(target_url)
+            # Verify login by checking for specific elements
+            login_verified = await verify_login(page, screenshot_path)
+        except Exception as e:
+            log_event(f"ERROR checking {target_url}: {str(e)}")
+            login_verified = False
+        finally:
+            await page.close()
         
-        # Use a fixed timeout instead of networkidle to avoid issues with dynamic ads
-        log_event("Waiting 5 seconds for page to load...")
-        page.wait_for_timeout(5000)  # 5 seconds
+        self.all_verified = self.all_verified and login_verified
+        return login_verified
+
+async def main():
+    log_event("Starting Playwright session to check saved login state")
+    
+    # Check the pool URLs given on the command line, or the CBS_POOL_URL from environment variables
+    target_urls = sys.argv[1:] or [os.getenv("CBS_POOL_URL")]
+    if not all(target_urls):
+        log_event("ERROR: CBS_POOL_URL environment variable not found")
+        print("❌ Error: CBS_POOL_URL not found in .env file")
+        print("   Please make sure you have set CBS_POOL_URL in your .env file")
+        return
+    
+    async with SessionChecker() as checker:
+        # Verify all URLs concurrently, each in its own page
+        if len(target_urls) == 1:
+            screenshot_paths = ["login_verification.png"]
+        else:
+            screenshot_paths = [f"login_verification_{i+1}.png" for i in range(len(target_urls))]
+        results = await asyncio.gather(*(
+            checker.verify(url, path) for url, path in zip(target_urls, screenshot_paths)
+        ))
         
-        # Verify login by checking for specific elements
-        login_verified = verify_login(page)
+        if len(target_urls) > 1:
+            for url, login_verified in zip(target_urls, results):
+                print(f"{'✅' if login_verified else '❌'} {url}")
         
-        if login_verified:
+        if all(results):
             print("✅ Successfully verified CBS login state - you are properly logged in!")
-            print("   Watch the terminal for detailed debug logs of all Playwright actions.")
+            if DEBUG:
+                print("   Watch the terminal for detailed debug logs of all Playwright actions.")
         else:
             print("❌ Login verification failed - your session may have expired.")
             print("   Please run 'python login.py' to create a new session.")
         
         input("Press ENTER to close...")
-        
-        log_event("Closing browser")
-        browser.close()
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
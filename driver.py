@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+driver.py - Shared Playwright browser for the CBS Sports Pickem scripts
+
+Launches Chromium once per process and hands out a fresh browser context per task,
+optionally preloaded with the saved login state from cbs_storage.json.
+
+Usage:
+    from driver import cbs_context
+
+    with cbs_context() as context:
+        page = context.new_page()
+"""
+
+import atexit
+import json
+import logging
+import os
+from contextlib import contextmanager
+from playwright.sync_api import sync_playwright
+
+# Saved login state written by login.py
+STORAGE_STATE_PATH = "cbs_storage.json"
+
+# Requests the scripts never need: they only read DOM text and click targets
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+BLOCKED_HOSTS = ("doubleclick.net", "googlesyndication.com", "amazon-adsystem.com", "adnxs.com")
+
+# Chromium flags that trim startup, memory and background work for automated runs
+CHROMIUM_ARGS = [
+    "--disable-gpu",
+    "--disable-dev-shm-usage",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-features=TranslateUI",
+]
+
+# Resolves to the row count once it has held steady for a few polls, for use with wait_for_function
+# polling every ROWS_SETTLED_POLL_MS; the list keeps growing for a moment after its first row appears
+ROWS_SETTLED_POLL_MS = 250
+ROWS_SETTLED_JS = """(selector) => {
+    const count = document.querySelectorAll(selector).length;
+    const state = window.__rowsSettled || (window.__rowsSettled = {count: -1, polls: 0});
+    state.polls = count === state.count ? state.polls + 1 : 0;
+    state.count = count;
+    return count > 0 && state.polls >= 2 ? count : false;
+}"""
+
+logger = logging.getLogger('playwright_debug')
+
+# Browser shared by every context created in this process, started on first use
+_playwright = None
+_browser = None
+
+# Parsed login state with the modification time it was read at, so each context skips the file
+_storage_cache = None
+
+def log_event(message):
+    logger.info(message)
+
+def block_nonessential(route):
+    """Abort images, fonts, media, stylesheets and ad requests; let everything else through"""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        route.abort()
+    else:
+        route.continue_()
+
+def get_browser(headless=False, slow_mo=0):
+    """Return the shared Chromium browser, launching it on first use
+
+    headless and slow_mo only apply to the launch, later calls reuse the running browser.
+    """
+    global _playwright, _browser
+    if _browser is None:
+        log_event("Launching browser")
+        _playwright = sync_playwright().start()
+        _browser = _playwright.chromium.launch(headless=headless, slow_mo=slow_mo, args=CHROMIUM_ARGS)
+        atexit.register(close_browser)
+    return _browser
+
+def close_browser():
+    """Close the shared browser and stop Playwright"""
+    global _playwright, _browser
+    if _browser is not None:
+        log_event("Closing browser")
+        _browser.close()
+        _playwright.stop()
+        _browser = None
+        _playwright = None
+
+def load_storage_state():
+    """Return the saved login state as a dict, re-reading cbs_storage.json only after it changes"""
+    global _storage_cache
+    mtime = os.stat(STORAGE_STATE_PATH).st_mtime_ns
+    if _storage_cache is None or _storage_cache[0] != mtime:
+        with open(STORAGE_STATE_PATH, 'rb') as f:
+            _storage_cache = (mtime, json.loads(f.read()))
+    return _storage_cache[1]
+
+@contextmanager
+def cbs_context(storage=True, headless=False, slow_mo=0, block_resources=True):
+    """Yield a new browser context on the shared browser, closing it afterwards
+
+    With storage=True the context starts from the login state saved in cbs_storage.json.
+    With block_resources=True images, fonts, media, stylesheets and ads are never downloaded.
+    """
+    browser = get_browser(headless=headless, slow_mo=slow_mo)
+    context = browser.new_context(storage_state=load_storage_state() if storage else None)
+    if block_resources:
+        context.route("**/*", block_nonessential)
+    try:
+        yield context
+    finally:
+        context.close()
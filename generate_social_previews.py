@@ -15,10 +15,16 @@ If no path is provided, it will use the current week's folder.
 import os
 import json
 import argparse
+import atexit
 import logging
 import re
 import base64
+import functools
+import tempfile
+from collections import namedtuple
 from datetime import datetime
+from html import escape
+from pathlib import Path
 from playwright.sync_api import sync_playwright
 
 # Configure logging
@@ -64,9 +70,6 @@ TEAM_CODE_TO_NAME = {
     '247415': 'TEXANS',
 }
 
-# Team name to code mapping
-TEAM_NAME_TO_CODE = {v: k for k, v in TEAM_CODE_TO_NAME.items()}
-
 # Team colors mapping
 TEAM_COLORS = {
     'CARDINALS': 'bg-red-700',
@@ -103,33 +106,97 @@ TEAM_COLORS = {
     'TEXANS': 'bg-red-800',
 }
 
+# Prebuilt Tailwind styles for the preview template, inlined instead of loading the Tailwind CDN
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "tailwind.css")) as css_file:
+    TAILWIND_CSS = css_file.read()
+
+# Opening tag of an SVG document, used to inject a white fill
+SVG_OPEN_TAG_RE = re.compile(rb'<svg\b')
+
+# Season folders (YYYY-YYYY), week folders, and the day/time parts of a game time like "Thu @ 5:20 PM"
+SEASON_DIR_RE = re.compile(r'\d{4}-\d{4}')
+WEEK_DIR_RE = re.compile(r'week-(\d+)')
+GAME_DAY_RE = re.compile(r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun)')
+GAME_TIME_RE = re.compile(r'(\d+:\d+ [AP]M)')
+
+# Each preview image is one fixed-size panel of the rendered page
+PANEL_WIDTH = 720
+PANEL_HEIGHT = 1280
+
+# RGB values of the Tailwind background classes used in TEAM_COLORS
+TAILWIND_RGB = {
+    'bg-purple-900': (88, 28, 135),
+    'bg-red-600': (220, 38, 38),
+    'bg-red-700': (185, 28, 28),
+    'bg-red-800': (153, 27, 27),
+    'bg-green-700': (21, 128, 61),
+    'bg-green-800': (22, 101, 52),
+    'bg-blue-400': (96, 165, 250),
+    'bg-blue-500': (59, 130, 246),
+    'bg-blue-600': (37, 99, 235),
+    'bg-blue-700': (29, 78, 216),
+    'bg-blue-800': (30, 64, 175),
+    'bg-blue-900': (30, 58, 138),
+    'bg-yellow-500': (234, 179, 8),
+    'bg-yellow-700': (161, 98, 7),
+    'bg-orange-500': (249, 115, 22),
+    'bg-orange-600': (234, 88, 12),
+    'bg-orange-700': (194, 65, 12),
+    'bg-teal-500': (20, 184, 166),
+    'bg-teal-600': (13, 148, 136),
+    'bg-teal-800': (17, 94, 89),
+    'bg-black': (0, 0, 0),
+}
+
+# Chromium flags for rendering a static, offline page headlessly
+CHROMIUM_ARGS = [
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-timer-throttling",
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--font-render-hinting=none",
+]
+
+# Browser shared by every preview rendered in this process, started on first use
+_playwright = None
+_browser = None
+
+def _get_browser():
+    """Return the shared Chromium browser, launching it on first use"""
+    global _playwright, _browser
+    if _browser is None:
+        _playwright = sync_playwright().start()
+        _browser = _playwright.chromium.launch(args=CHROMIUM_ARGS)
+        atexit.register(_shutdown_browser)
+    return _browser
+
+def _shutdown_browser():
+    """Close the shared browser and stop Playwright"""
+    global _playwright, _browser
+    if _browser is not None:
+        _browser.close()
+        _playwright.stop()
+        _browser = None
+        _playwright = None
+
 # Helper function to convert Tailwind color classes to CSS color values
 def getColorFromClass(colorClass, opacity=0.5):
     """Convert Tailwind color classes to CSS color values"""
-    colorMap = {
-        'bg-purple-900': f"rgba(88, 28, 135, {opacity})",
-        'bg-red-600': f"rgba(220, 38, 38, {opacity})",
-        'bg-red-700': f"rgba(185, 28, 28, {opacity})",
-        'bg-red-800': f"rgba(153, 27, 27, {opacity})",
-        'bg-green-700': f"rgba(21, 128, 61, {opacity})",
-        'bg-green-800': f"rgba(22, 101, 52, {opacity})",
-        'bg-blue-400': f"rgba(96, 165, 250, {opacity})",
-        'bg-blue-500': f"rgba(59, 130, 246, {opacity})",
-        'bg-blue-600': f"rgba(37, 99, 235, {opacity})",
-        'bg-blue-700': f"rgba(29, 78, 216, {opacity})",
-        'bg-blue-800': f"rgba(30, 64, 175, {opacity})",
-        'bg-blue-900': f"rgba(30, 58, 138, {opacity})",
-        'bg-yellow-500': f"rgba(234, 179, 8, {opacity})",
-        'bg-yellow-700': f"rgba(161, 98, 7, {opacity})",
-        'bg-orange-500': f"rgba(249, 115, 22, {opacity})",
-        'bg-orange-600': f"rgba(234, 88, 12, {opacity})",
-        'bg-orange-700': f"rgba(194, 65, 12, {opacity})",
-        'bg-teal-500': f"rgba(20, 184, 166, {opacity})",
-        'bg-teal-600': f"rgba(13, 148, 136, {opacity})",
-        'bg-teal-800': f"rgba(17, 94, 89, {opacity})",
-        'bg-black': f"rgba(0, 0, 0, {opacity})"
-    }
-    return colorMap.get(colorClass, f"rgba(107, 114, 128, {opacity})")  # Default to gray if color not found
+    r, g, b = TAILWIND_RGB.get(colorClass, (107, 114, 128))  # Default to gray if color not found
+    return f"rgba({r}, {g}, {b}, {opacity})"
+
+# Everything the preview needs about a team, resolved once at import
+TeamInfo = namedtuple('TeamInfo', 'code color bg_color border_color')
+
+def _team_info(code, color):
+    """Build the TeamInfo for a team code and its Tailwind color class"""
+    return TeamInfo(code, color, getColorFromClass(color, 0.2), getColorFromClass(color, 1.0))
+
+# Team name to TeamInfo mapping, plus the fallback used for names we don't know
+TEAMS = {name: _team_info(code, TEAM_COLORS.get(name, "bg-gray-800")) for code, name in TEAM_CODE_TO_NAME.items()}
+UNKNOWN_TEAM = _team_info(None, "bg-gray-800")
 
 def log_event(message):
     """Log an event with timestamp"""
@@ -139,22 +206,23 @@ def get_default_matchups_path():
     """Get the default path for the current week's matchups.json file"""
     try:
         # Get all directories that look like YYYY-YYYY (season folders)
-        season_dirs = [d for d in os.listdir() if re.match(r'\d{4}-\d{4}', d) and os.path.isdir(d)]
+        # scandir entries know whether they are directories without an extra stat per entry
+        with os.scandir() as entries:
+            season_dirs = [e.name for e in entries if SEASON_DIR_RE.match(e.name) and e.is_dir()]
         if not season_dirs:
             return None  # No season folders found
         
         # Get the most recent season
-        latest_season = sorted(season_dirs)[-1]
+        latest_season = max(season_dirs)
         
         # Get all week folders in that season
-        week_dirs = [d for d in os.listdir(latest_season) 
-                    if d.startswith("week-") and os.path.isdir(os.path.join(latest_season, d))]
+        with os.scandir(latest_season) as entries:
+            week_dirs = [e.name for e in entries if e.name.startswith("week-") and e.is_dir()]
         if not week_dirs:
             return None  # No week folders found
         
-        # Get the most recent week
-        # Sort by week number (extract number from "week-X")
-        latest_week = sorted(week_dirs, key=lambda w: int(w.split("-")[1]))[-1]
+        # Get the most recent week by week number (extract number from "week-X")
+        latest_week = max(week_dirs, key=lambda w: int(w.rpartition("-")[2]))
         
         # Return the path to the folder
         return os.path.join(latest_season, latest_week)
@@ -167,13 +235,13 @@ def load_data(folder_path):
     try:
         # Load matchups data
         matchups_path = os.path.join(folder_path, "matchups.json")
-        with open(matchups_path, 'r') as f:
-            matchups_data = json.load(f)
+        with open(matchups_path, 'rb') as f:
+            matchups_data = json.loads(f.read())
         
         # Load picks data
         picks_path = os.path.join(folder_path, "my_picks.json")
-        with open(picks_path, 'r') as f:
-            picks_data = json.load(f)
+        with open(picks_path, 'rb') as f:
+            picks_data = json.loads(f.read())
         
         log_event(f"Loaded data from {folder_path}")
         return matchups_data, picks_data
@@ -183,14 +251,22 @@ def load_data(folder_path):
         log_event(traceback.format_exc())
         return None, None
 
-def get_team_svg_base64(team_name):
-    """Get the team SVG as a base64 encoded string"""
+@functools.lru_cache(maxsize=None)
+def get_team_svg_by_code(team_code):
+    """Get the SVG for a CBS team code as a base64 encoded string, reading each file only once"""
+    return _load_and_encode(TEAM_CODE_TO_NAME.get(team_code, f"TEAM-{team_code}"), team_code)
+
+def get_team_logo(team_name, team_info):
+    """Get the logo for a team looked up in TEAMS, or None (the card shows its name instead) when the team is unknown"""
+    if not team_info.code:
+        log_event(f"No team code found for {team_name}")
+        return None
+    
+    return get_team_svg_by_code(team_info.code)
+
+def _load_and_encode(team_name, team_code):
+    """Read a team SVG, whiten it and return it as a base64 data URI"""
     try:
-        team_code = TEAM_NAME_TO_CODE.get(team_name)
-        if not team_code:
-            log_event(f"No team code found for {team_name}")
-            return None
-        
         svg_path = os.path.join("team_icons", f"{team_code}.svg")
         if not os.path.exists(svg_path):
             log_event(f"No SVG file found at {svg_path}")
@@ -205,15 +281,10 @@ def get_team_svg_base64(team_name):
             first_letter = team_name[0]
             svg_data = f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 100 100"><text x="50" y="50" font-family="Arial" font-size="50" text-anchor="middle" dominant-baseline="central" fill="white">{first_letter}</text></svg>'.encode('utf-8')
         else:
-            # Convert SVG to white if it exists
-            try:
-                svg_text = svg_data.decode('utf-8')
-                # Add fill="white" to the SVG to ensure it's white on the colored background
-                if '<svg' in svg_text and 'fill="white"' not in svg_text:
-                    svg_text = svg_text.replace('<svg', '<svg fill="white"')
-                    svg_data = svg_text.encode('utf-8')
-            except:
-                pass
+            # Add fill="white" to the root SVG element to ensure it's white on the colored background,
+            # working on the raw bytes so the file never needs decoding
+            if b'fill="white"' not in svg_data:
+                svg_data = SVG_OPEN_TAG_RE.sub(b'<svg fill="white"', svg_data, count=1)
         
         base64_data = base64.b64encode(svg_data).decode('utf-8')
         return f"data:image/svg+xml;base64,{base64_data}"
@@ -221,6 +292,14 @@ def get_team_svg_base64(team_name):
         log_event(f"Error getting team SVG: {str(e)}")
         return None
 
+def _add_card_markup(team, is_picked):
+    """Precompute the card background, border and logo markup for a team"""
+    # Picked team gets its color as background plus a solid border
+    team["background"] = team["bgColor"] if is_picked else "transparent"
+    team["border"] = f"border: 3px solid {team['borderColor']};" if is_picked else ""
+    team["logoTag"] = f'<img src="{team["logo"]}" alt="{escape(team["name"])}" />' if team["logo"] else escape(team["name"])
+    return team
+
 def prepare_game_data(matchups_data, picks_data):
     """Prepare game data for rendering"""
     games = []
@@ -232,8 +311,8 @@ def prepare_game_data(matchups_data, picks_data):
         game_time = matchup.get("game_time", "Time not found")
         
         # Extract date and time
-        date_match = re.search(r'(Mon|Tue|Wed|Thu|Fri|Sat|Sun)', game_time)
-        time_match = re.search(r'(\d+:\d+ [AP]M)', game_time)
+        date_match = GAME_DAY_RE.search(game_time)
+        time_match = GAME_TIME_RE.search(game_time)
         
         date = date_match.group(0) if date_match else ""
         time = time_match.group(1) if time_match else ""
@@ -253,29 +332,33 @@ def prepare_game_data(matchups_data, picks_data):
         is_away_picked = pick == away_team
         is_home_picked = pick == home_team
         
-        # Get team logos
-        away_logo = get_team_svg_base64(away_team)
-        home_logo = get_team_svg_base64(home_team)
+        # Look up each team once for its code and colors
+        away_info = TEAMS.get(away_team, UNKNOWN_TEAM)
+        home_info = TEAMS.get(home_team, UNKNOWN_TEAM)
         
-        # Get team colors
-        away_color = TEAM_COLORS.get(away_team, "bg-gray-800")
-        home_color = TEAM_COLORS.get(home_team, "bg-gray-800")
+        # Get team logos by team code
+        away_logo = get_team_logo(away_team, away_info)
+        home_logo = get_team_logo(home_team, home_info)
         
         games.append({
-            "awayTeam": {
+            "awayTeam": _add_card_markup({
                 "name": away_team,
                 "fullName": away_team,
                 "record": matchup.get("away_record", "0-0"),
                 "logo": away_logo,
-                "color": away_color
-            },
-            "homeTeam": {
+                "color": away_info.color,
+                "bgColor": away_info.bg_color,
+                "borderColor": away_info.border_color
+            }, is_away_picked),
+            "homeTeam": _add_card_markup({
                 "name": home_team,
                 "fullName": home_team,
                 "record": matchup.get("home_record", "0-0"),
                 "logo": home_logo,
-                "color": home_color
-            },
+                "color": home_info.color,
+                "bgColor": home_info.bg_color,
+                "borderColor": home_info.border_color
+            }, is_home_picked),
             "date": date,
             "time": time,
             "spread": spread,
@@ -285,19 +368,18 @@ def prepare_game_data(matchups_data, picks_data):
     
     return games
 
-def generate_html(games, title, week_number, year):
-    """Generate HTML for the social preview"""
-    html = f"""
+# Document head shared by every preview page, built once since it only depends on TAILWIND_CSS
+PAGE_HEAD = f"""
     <!DOCTYPE html>
     <html lang="en">
     <head>
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>NFL Picks</title>
-        <script src="https://cdn.tailwindcss.com"></script>
         <style>
             body {{
                 display: flex;
+                flex-direction: column;
                 justify-content: center;
                 align-items: center;
                 font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
@@ -306,6 +388,7 @@ def generate_html(games, title, week_number, year):
             .container {{
                 width: 768px;
                 height: 1280px;
+                overflow: hidden;
                 background-color: #0a1f44; /* Navy background */
                 display: flex;
                 justify-content: center;
@@ -399,8 +482,25 @@ def generate_html(games, title, week_number, year):
                 margin: 0 8px;
             }}
         </style>
+        <style>{TAILWIND_CSS}</style>
+        <style>
+            /* Static screenshot: nothing should animate before the capture */
+            *, *::before, *::after {{
+                transition: none !important;
+                animation: none !important;
+            }}
+        </style>
     </head>
     <body>
+    """
+
+PAGE_FOOTER = """
+    </body>
+    </html>
+    """
+
+# Opening and closing markup of one preview panel, wrapped around its game cards
+PANEL_HEADER_TEMPLATE = """
         <div class="container">
             <div class="content-container">
                 <!-- Header -->
@@ -414,43 +514,38 @@ def generate_html(games, title, week_number, year):
                 <!-- Games Container -->
                 <div class="games-container">
     """
-    
-    for i, game in enumerate(games):
-        away_team = game["awayTeam"]
-        home_team = game["homeTeam"]
-        
-        # Get color values for team backgrounds
-        away_color = getColorFromClass(away_team['color'], 0.2)
-        home_color = getColorFromClass(home_team['color'], 0.2)
-        
-        # Border for picked team
-        away_border = f"border: 3px solid {getColorFromClass(away_team['color'], 1.0)};" if game["pick"] == "away" else ""
-        home_border = f"border: 3px solid {getColorFromClass(home_team['color'], 1.0)};" if game["pick"] == "home" else ""
-        
-        html += f"""
+
+PANEL_FOOTER = """
+                </div>
+            </div>
+        </div>
+    """
+
+# Markup for one game card, filled in with the values from _card_context()
+GAME_CARD_TEMPLATE = """
                     <div class="game-card">
                         <!-- Game Date & Time -->
                         <div class="game-header">
-                            <div class="game-date text-gray-700 text-sm">{game["date"]}</div>
-                            <div class="game-time text-gray-700 text-sm">{game["time"]}</div>
-                            <div class="game-spread font-medium text-gray-700 text-sm">{game["spread"]}</div>
+                            <div class="game-date text-gray-700 text-sm">{date}</div>
+                            <div class="game-time text-gray-700 text-sm">{time}</div>
+                            <div class="game-spread font-medium text-gray-700 text-sm">{spread}</div>
                         </div>
                         
                         <!-- Teams in a row -->
                         <div class="team-container">
                             <!-- Away Team -->
                             <div class="team-box" 
-                                 style="background: {game['pick'] == 'away' and away_color or 'transparent'}; 
-                                        {game['pick'] == 'away' and away_border or ''}">
+                                 style="background: {away_background}; 
+                                        {away_border}">
                                 <div class="team-logo">
-                                    {away_team['logo'] and f'<img src="{away_team["logo"]}" alt="{away_team["name"]}" />' or away_team["name"]}
+                                    {away_logo}
                                 </div>
                                 <div class="team-info">
                                     <div class="team-name text-gray-900">
-                                        {away_team["fullName"]}
+                                        {away_full_name}
                                     </div>
                                     <div class="team-record">
-                                        {away_team["record"]}
+                                        {away_record}
                                     </div>
                                 </div>
                             </div>
@@ -460,33 +555,58 @@ def generate_html(games, title, week_number, year):
                             
                             <!-- Home Team - Right aligned -->
                             <div class="team-box" 
-                                 style="background: {game['pick'] == 'home' and home_color or 'transparent'}; 
-                                        {game['pick'] == 'home' and home_border or ''}">
+                                 style="background: {home_background}; 
+                                        {home_border}">
                                 <div class="team-info" style="text-align: right;">
                                     <div class="team-name text-gray-900">
-                                        {home_team["fullName"]}
+                                        {home_full_name}
                                     </div>
                                     <div class="team-record">
-                                        {home_team["record"]}
+                                        {home_record}
                                     </div>
                                 </div>
                                 <div class="team-logo">
-                                    {home_team['logo'] and f'<img src="{home_team["logo"]}" alt="{home_team["name"]}" />' or home_team["name"]}
+                                    {home_logo}
                                 </div>
                             </div>
                         </div>
                     </div>
         """
+
+def generate_html(panels, week_number, year):
+    """Generate HTML for the social preview, one stacked panel per (title, games) pair"""
+    panels_html = "".join(generate_panel_html(games, title) for title, games in panels)
+    return "".join([PAGE_HEAD, panels_html, PAGE_FOOTER])
+
+def generate_panel_html(games, title):
+    """Generate the HTML for a single preview panel"""
+    header = PANEL_HEADER_TEMPLATE.format(title=escape(title))
+    return "".join([header, generate_game_cards_html(games), PANEL_FOOTER])
+
+def _card_context(game):
+    """Flatten a game into the values substituted into GAME_CARD_TEMPLATE, escaping any text"""
+    away_team = game["awayTeam"]
+    home_team = game["homeTeam"]
     
-    html += """
-                </div>
-            </div>
-        </div>
-    </body>
-    </html>
-    """
-    
-    return html
+    return {
+        "date": escape(game["date"]),
+        "time": escape(game["time"]),
+        "spread": escape(game["spread"]),
+        "away_background": away_team["background"],
+        "away_border": away_team["border"],
+        "away_logo": away_team["logoTag"],
+        "away_full_name": escape(away_team["fullName"]),
+        "away_record": escape(away_team["record"]),
+        "home_background": home_team["background"],
+        "home_border": home_team["border"],
+        "home_logo": home_team["logoTag"],
+        "home_full_name": escape(home_team["fullName"]),
+        "home_record": escape(home_team["record"]),
+    }
+
+def generate_game_cards_html(games):
+    """Generate the game card HTML that fills the games container"""
+    return "".join(GAME_CARD_TEMPLATE.format_map(_card_context(game)) for game in games)
 
 def generate_social_previews(folder_path):
     """Generate social preview images of NFL picks"""
@@ -502,7 +622,7 @@ def generate_social_previews(folder_path):
         year = datetime.now().year
         
         # Try to extract week number from folder path
-        week_match = re.search(r'week-(\d+)', folder_path)
+        week_match = WEEK_DIR_RE.search(folder_path)
         week_number = int(week_match.group(1)) if week_match else 0
         
         # Prepare game data
@@ -513,26 +633,41 @@ def generate_social_previews(folder_path):
         first_half = games[:half_length]
         second_half = games[half_length:]
         
-        # Generate HTML for each half
-        first_half_html = generate_html(first_half, f"WEEK {week_number} PICKS (1/2)", week_number, year)
-        second_half_html = generate_html(second_half, f"WEEK {week_number} PICKS (2/2)", week_number, year)
+        # Render both halves as stacked panels of one page so it is only loaded and laid out once
+        preview_html = generate_html([
+            (f"WEEK {week_number} PICKS (1/2)", first_half),
+            (f"WEEK {week_number} PICKS (2/2)", second_half),
+        ], week_number, year)
         
-        # Generate screenshots using Playwright
-        with sync_playwright() as p:
-            browser = p.chromium.launch()
-            page = browser.new_page(viewport={"width": 720, "height": 1280})
-            
-            # Generate first half screenshot
-            log_event("Generating first half screenshot")
-            page.set_content(first_half_html)
-            page.screenshot(path=os.path.join(folder_path, "my_picks_1.png"))
+        # Generate screenshots using the shared browser, in a context of their own
+        browser = _get_browser()
+        # Everything the page needs is inline and static, so the context never touches
+        # the network, runs no scripts and has no motion to wait on
+        context = browser.new_context(
+            viewport={"width": PANEL_WIDTH, "height": PANEL_HEIGHT},
+            offline=True,
+            java_script_enabled=False,
+            reduced_motion="reduce",
+        )
+        try:
+            page = context.new_page()
             
-            # Generate second half screenshot
-            log_event("Generating second half screenshot")
-            page.set_content(second_half_html)
-            page.screenshot(path=os.path.join(folder_path, "my_picks_2.png"))
+            # Load the page from a file so Chromium parses it from disk instead of
+            # receiving the whole document (inline logos included) over the protocol
+            with tempfile.NamedTemporaryFile('w', suffix='.html', encoding='utf-8', delete=False) as html_file:
+                html_file.write(preview_html)
+            try:
+                page.goto(Path(html_file.name).as_uri())
+            finally:
+                os.remove(html_file.name)
             
-            browser.close()
+            # Capture each half by clipping its panel out of the full page
+            for index, image_name in enumerate(["my_picks_1.png", "my_picks_2.png"]):
+                log_event(f"Generating screenshot {image_name}")
+                clip = {"x": 0, "y": index * PANEL_HEIGHT, "width": PANEL_WIDTH, "height": PANEL_HEIGHT}
+                page.screenshot(path=os.path.join(folder_path, image_name), full_page=True, clip=clip)
+        finally:
+            context.close()
         
         log_event(f"Successfully generated social preview images in {folder_path}")
         return True
@@ -1,9 +1,10 @@
 
-from playwright.sync_api import sync_playwright
 import logging
 import os
+import sys
 import argparse
 from dotenv import load_dotenv
+from driver import cbs_context
 
 # Load environment variables from .env file if it exists
 load_dotenv()
@@ -25,6 +26,7 @@ def main():
     parser.add_argument('--headless', action='store_true', help='Run in headless mode')
     parser.add_argument('--manual', action='store_true', help='Manual login mode')
     parser.add_argument('--debug', action='store_true', help='Enable debug output')
+    parser.add_argument('--yes', action='store_true', help='Never wait for ENTER; fail instead of waiting for manual steps')
     args = parser.parse_args()
     
     # Debug: Print all environment variables if debug flag is set
@@ -47,19 +49,23 @@ def main():
     # Check if we're in manual mode or missing credentials
     manual_login = args.manual or not (username and password)
     
+    # Prompts need a person at the terminal; scheduled runs must never block on stdin
+    interactive = not args.yes and sys.stdin.isatty()
+    if manual_login and not interactive:
+        print("❌ Manual login needs an interactive terminal. Run without --yes, or set CBS_USERNAME and CBS_PASSWORD.")
+        return
+    
     log_event("Starting Playwright session")
-    with sync_playwright() as p:
-        log_event("Launching browser")
-        browser = p.chromium.launch(headless=args.headless, slow_mo=200)
-        
-        log_event("Creating new browser context")
-        context = browser.new_context()
-        
+    # Slow motion only helps while watching a debug run; the page is fully loaded
+    # because the login form may need a person to finish it (CAPTCHA, verification)
+    log_event("Creating new browser context")
+    with cbs_context(storage=False, headless=args.headless, slow_mo=200 if args.debug else 0, block_resources=False) as context:
         # Create a new page without verbose network event listeners
         page = context.new_page()
         
-        # Only log console errors which might be important
-        #page.on("console", lambda msg: log_event(f"Console {msg.type}: {msg.text}") if msg.type == "error" else None)
+        # Only log console errors, and only when debugging, so normal runs skip a callback per message
+        if args.debug:
+            page.on("console", lambda msg: log_event(f"Console {msg.type}: {msg.text}") if msg.type == "error" else None)
         
         # Navigate to the CBS Sports Pickem pool URL
         log_event(f"Navigating to: {pool_url}")
@@ -114,6 +120,9 @@ def main():
                 log_event("Login successful")
             except Exception as e:
                 log_event(f"Error during automatic login: {str(e)}")
+                if not interactive:
+                    print("\n❌ Automatic login failed and no one is at the terminal to finish it. Login state was not saved.")
+                    return
                 print("\n❌ Automatic login encountered an issue. This might be due to a CAPTCHA or verification step.")
                 print("Please complete any verification steps and log in manually if needed.")
                 print("The script has already filled in your username and password from the .env file.")
@@ -123,8 +132,5 @@ def main():
         context.storage_state(path="cbs_storage.json")
         print("✅ Login state saved to cbs_storage.json")
 
-        log_event("Closing browser")
-        browser.close()
-
 if __name__ == "__main__":
     main()
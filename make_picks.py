@@ -1,10 +1,12 @@
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 import logging
-import time
 import json
 import os
 import sys
+import argparse
+from urllib.parse import urlparse
 from dotenv import load_dotenv
+from driver import ROWS_SETTLED_JS, ROWS_SETTLED_POLL_MS, cbs_context
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,19 +19,43 @@ logging.basicConfig(
 )
 logger = logging.getLogger('playwright_debug')
 
+# Each matchup row on the picks page
+MATCHUP_SELECTOR = 'div.MuiBox-root div.MuiStack-root[data-cy]'
+
+# Collects team names and current selection for every matchup row in one pass
+MATCHUPS_JS = """(selector) => [...document.querySelectorAll(selector)].map(c => {
+    const away = c.querySelector('div.MuiStack-root.left-side h3.MuiTypography-h3');
+    const home = c.querySelector('div.MuiStack-root.right-side h3.MuiTypography-h3');
+    return {
+        away: away ? away.innerText.trim() : null,
+        home: home ? home.innerText.trim() : null,
+        awaySelected: !!c.querySelector('div.MuiStack-root.left-side.item-selected'),
+        homeSelected: !!c.querySelector('div.MuiStack-root.right-side.item-selected'),
+    };
+})"""
+
 def log_event(message):
     logger.info(message)
 
 def load_picks_from_file(filename):
     """Load picks from a JSON file"""
     try:
-        with open(filename, 'r') as f:
-            picks_data = json.load(f)
+        with open(filename, 'rb') as f:
+            picks_data = json.loads(f.read())
             return picks_data
     except Exception as e:
         log_event(f"Error loading picks from file: {str(e)}")
         return None
 
+def is_save_response(response):
+    """True for the CBS request that saves the picks, not analytics beacons sent alongside it"""
+    request = response.request
+    return (
+        request.method in ("POST", "PUT")
+        and request.resource_type in ("fetch", "xhr")
+        and (urlparse(response.url).hostname or "").endswith("cbssports.com")
+    )
+
 def make_picks(page, picks_list):
     """Make picks based on the provided list"""
     log_event("Starting to make picks")
@@ -37,84 +63,85 @@ def make_picks(page, picks_list):
     # Wait for the page to load and matchups to appear
     try:
         # Wait for content to load
-        page.wait_for_selector('div.MuiBox-root div.MuiStack-root[data-cy]', timeout=60000)
+        page.wait_for_selector(MATCHUP_SELECTOR, timeout=60000)
         log_event("Content has appeared")
         
-        # Give extra time for everything to render
-        time.sleep(2)
+        # Let the rest of the rows render before reading them
+        try:
+            page.wait_for_function(ROWS_SETTLED_JS, arg=MATCHUP_SELECTOR, polling=ROWS_SETTLED_POLL_MS, timeout=15000)
+        except PlaywrightTimeoutError:
+            log_event("Matchup rows were still changing, reading them anyway")
+        
+        # Read every matchup's team names and selection state in a single round trip
+        matchups = page.evaluate(MATCHUPS_JS, MATCHUP_SELECTOR)
+        log_event(f"Found {len(matchups)} potential matchup containers")
         
-        # Get all matchup containers
-        matchup_containers = page.query_selector_all('div.MuiBox-root div.MuiStack-root[data-cy]')
-        log_event(f"Found {len(matchup_containers)} potential matchup containers")
+        # Map each team name to its matchup row and side; the first row wins if a team repeats
+        team_to_matchup = {}
+        for i, matchup in enumerate(matchups):
+            if not matchup["away"] or not matchup["home"]:
+                log_event(f"Skipping matchup {i+1} - Could not find team names")
+                continue
+            team_to_matchup.setdefault(matchup["away"], (i, "away"))
+            team_to_matchup.setdefault(matchup["home"], (i, "home"))
         
         picks_made = 0
+        # Matchups that already have their pick, so a malformed list naming both teams keeps the first
+        picked_matchups = set()
+        # Selection markers of the clicked sides, confirmed together once every click is sent
+        pending_selections = []
         
-        # Process each matchup
-        for i, container in enumerate(matchup_containers):
+        # Walk the picks once, going straight to each picked team's matchup
+        for pick in picks_list:
+            hit = team_to_matchup.get(pick)
+            if hit is None:
+                log_event(f"No matchup found for pick: {pick}")
+                continue
+            
+            i, pick_for_matchup = hit
+            away_team = matchups[i]["away"]
+            home_team = matchups[i]["home"]
+            if i in picked_matchups:
+                log_event(f"Both {away_team} and {home_team} are in the picks list, using the first one listed")
+                continue
+            picked_matchups.add(i)
+            
             try:
-                # Extract game info to identify the matchup
-                away_team_element = container.query_selector('div.MuiStack-root.left-side h3.MuiTypography-h3')
-                home_team_element = container.query_selector('div.MuiStack-root.right-side h3.MuiTypography-h3')
-                
-                if not away_team_element or not home_team_element:
-                    log_event(f"Skipping matchup {i+1} - Could not find team names")
-                    continue
-                
-                away_team = away_team_element.inner_text().strip()
-                home_team = home_team_element.inner_text().strip()
-                
-                # Check if we have a pick for this matchup
-                pick_for_matchup = None
-                for pick in picks_list:
-                    if pick == away_team:
-                        pick_for_matchup = "away"
-                        break
-                    elif pick == home_team:
-                        pick_for_matchup = "home"
-                        break
-                
-                if not pick_for_matchup:
-                    log_event(f"No pick found for matchup: {away_team} @ {home_team}")
-                    continue
-                
-                # Check if a pick is already made
-                away_selected = container.query_selector('div.MuiStack-root.left-side.item-selected') is not None
-                home_selected = container.query_selector('div.MuiStack-root.right-side.item-selected') is not None
-                
                 # If the desired pick is already selected, skip
-                if (pick_for_matchup == "away" and away_selected) or (pick_for_matchup == "home" and home_selected):
+                if (pick_for_matchup == "away" and matchups[i]["awaySelected"]) or (pick_for_matchup == "home" and matchups[i]["homeSelected"]):
                     log_event(f"Pick already made for {away_team} @ {home_team}")
                     continue
                 
-                # Make the pick by clicking on the team
-                if pick_for_matchup == "away":
-                    # Click on away team
-                    away_team_container = container.query_selector('div.MuiStack-root.left-side')
-                    if away_team_container:
-                        log_event(f"Clicking on {away_team}")
-                        away_team_container.click()
-                        picks_made += 1
-                        # Wait a bit to avoid overwhelming the page
-                        time.sleep(0.5)
-                else:
-                    # Click on home team
-                    home_team_container = container.query_selector('div.MuiStack-root.right-side')
-                    if home_team_container:
-                        log_event(f"Clicking on {home_team}")
-                        home_team_container.click()
-                        picks_made += 1
-                        # Wait a bit to avoid overwhelming the page
-                        time.sleep(0.5)
+                # Make the pick by clicking on the team (away on the left, home on the right)
+                container = page.locator(MATCHUP_SELECTOR).nth(i)
+                side = "left-side" if pick_for_matchup == "away" else "right-side"
+                log_event(f"Clicking on {pick}")
+                container.locator(f'div.MuiStack-root.{side}').first.click()
+                pending_selections.append((i, container.locator(f'div.MuiStack-root.{side}.item-selected').first))
+                picks_made += 1
                 
             except Exception as e:
                 log_event(f"Error making pick for matchup {i+1}: {str(e)}")
         
+        # Report the matchups the picks list did not cover
+        for i, matchup in enumerate(matchups):
+            if i not in picked_matchups and matchup["away"] and matchup["home"]:
+                log_event(f"No pick found for matchup: {matchup['away']} @ {matchup['home']}")
+        
+        # Wait until the page marks every clicked side as selected; the selections update
+        # while the remaining clicks are still being sent, so most of these return at once
+        for i, selected in pending_selections:
+            try:
+                selected.wait_for(timeout=5000)
+            except Exception as e:
+                log_event(f"Pick for matchup {i+1} was not confirmed: {str(e)}")
+        
         # Enter MNF tiebreaker score (44)
         try:
             log_event("Looking for MNF tiebreaker input field")
-            tiebreaker_input = page.query_selector('input[placeholder="Score"][inputmode="numeric"][pattern="[0-9]*"]')
+            tiebreaker_input = page.locator('input[placeholder="Score"][inputmode="numeric"][pattern="[0-9]*"]').first
             
-            if tiebreaker_input:
+            if tiebreaker_input.count():
                 log_event("Found tiebreaker input field, entering score: 44")
                 tiebreaker_input.fill("44")
                 log_event("Tiebreaker score entered")
@@ -126,13 +153,21 @@ def make_picks(page, picks_list):
         # Click the Save button
         try:
             log_event("Looking for Save button")
-            save_button = page.query_selector('button.MuiButton-containedPrimary:has-text("Save")')
+            save_button = page.locator('button.MuiButton-containedPrimary:has-text("Save")').first
             
-            if save_button:
+            if save_button.count():
                 log_event("Found Save button, clicking it")
-                save_button.click()
-                log_event("Save button clicked")
-                time.sleep(2)  # Wait for save to complete
+                # Wait for the save request itself to complete instead of sleeping a fixed time
+                try:
+                    with page.expect_response(is_save_response, timeout=10000) as save_response:
+                        save_button.click()
+                    if not save_response.value.ok:
+                        logger.error(f"Saving picks failed with status {save_response.value.status}")
+                        return 0
+                    log_event("Save button clicked and picks saved")
+                except PlaywrightTimeoutError:
+                    logger.error("Save button clicked, but no save response was seen")
+                    return 0
             else:
                 log_event("Could not find Save button")
         except Exception as e:
@@ -146,51 +181,48 @@ def make_picks(page, picks_list):
         return 0
 
 def main():
-    """Main function to run the script"""
-    log_event("Starting script")
+    """Main function to run the script; returns the process exit status, 1 unless picks were made and saved"""
+    parser = argparse.ArgumentParser(
+        description='Submit picks to CBS Sports Pickem',
+        epilog='Example picks file format: ["EAGLES", "CHIEFS", "BUCCANEERS"]'
+    )
+    parser.add_argument('picks_file', help='Path to a JSON list of team names to pick')
+    parser.add_argument('--yes', action='store_true', help='Close the browser when done instead of waiting for ENTER')
+    parser.add_argument('--headless', action='store_true', help='Run in headless mode')
+    args = parser.parse_args()
     
-    # Check if picks file is provided
-    if len(sys.argv) < 2:
-        print("Usage: python make_picks.py <picks_file.json>")
-        print("Example picks file format: [\"EAGLES\", \"CHIEFS\", \"BUCCANEERS\"]")
-        return
+    log_event("Starting script")
+    picks_file = args.picks_file
     
-    picks_file = sys.argv[1]
+    # Only wait for a person when one is at the terminal
+    interactive = not args.yes and sys.stdin.isatty()
     
     # Load picks from file
     picks_data = load_picks_from_file(picks_file)
     if not picks_data:
         print(f"Could not load picks from {picks_file}")
-        return
+        return 1
     
     # Ensure picks_data is a list
     if not isinstance(picks_data, list):
         print(f"Picks data must be a list of team names. Found: {type(picks_data)}")
-        return
+        return 1
     
     log_event(f"Loaded {len(picks_data)} picks from {picks_file}")
     print(f"Loaded picks: {', '.join(picks_data)}")
     
-    with sync_playwright() as p:
-        log_event("Launching browser")
-        browser = p.chromium.launch(headless=False, slow_mo=200)
-        
-        log_event("Creating context with saved storage state")
-        context = browser.new_context(storage_state="cbs_storage.json")
-        
+    log_event("Creating context with saved storage state")
+    with cbs_context(headless=args.headless) as context:
         # Create a new page without verbose network event listeners
         page = context.new_page()
         
-        # Only log console errors which might be important
-        # page.on("console", lambda msg: log_event(f"Console {msg.type}: {msg.text}") if msg.type == "error" else None)
-        
         # Navigate to the CBS Sports Pickem pool URL from environment variables
         target_url = os.getenv("CBS_POOL_URL")
         if not target_url:
             log_event("ERROR: CBS_POOL_URL environment variable not found")
             print("❌ Error: CBS_POOL_URL not found in .env file")
             print("   Please make sure you have set CBS_POOL_URL in your .env file")
-            return
+            return 1
             
         log_event(f"Navigating to: {target_url}")
         page.goto(target_url)
@@ -202,13 +234,12 @@ def main():
             print(f"\n✅ Successfully made {picks_made} picks")
             
             # Wait for user confirmation before closing
-            input("\nPress ENTER to close the browser...")
-        else:
-            print("\n❌ No picks were made. Check the logs for details.")
+            if interactive:
+                input("\nPress ENTER to close the browser...")
+            return 0
         
-        # Close the browser
-        log_event("Closing browser")
-        browser.close()
+        print("\n❌ No picks were made. Check the logs for details.")
+        return 1
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
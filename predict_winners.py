@@ -36,15 +36,21 @@ FAVORITE_TEAMS = [
     "VIKINGS"    # Advantage when spread is reasonable
 ]
 
+# Priority of each favorite team (lower is preferred), for O(1) membership checks
+FAVORITE_RANK = {team: rank for rank, team in enumerate(FAVORITE_TEAMS)}
+
 # Define what constitutes a "reasonable" spread (in points)
 REASONABLE_SPREAD = 5.5  # 5.5 points or less is considered reasonable
 
 # Define what constitutes strong expert consensus
 STRONG_EXPERT_CONSENSUS = 0.75  # 75% or more experts agree
 
-def log_event(message):
-    """Log an event with timestamp"""
-    logging.info(message)
+# Season folders (YYYY-YYYY) and the number in an expert pick count like "7 Picks"
+SEASON_DIR_RE = re.compile(r'\d{4}-\d{4}')
+PICK_COUNT_RE = re.compile(r'(\d+)')
+
+# Module logger; messages use %-style arguments so formatting is skipped when INFO is disabled
+logger = logging.getLogger(__name__)
 
 def get_default_matchups_path():
     """Get the default path for the current week's matchups.json file"""
@@ -56,27 +62,28 @@ def get_default_matchups_path():
     # Otherwise, look for the most recent season/week folder
     try:
         # Get all directories that look like YYYY-YYYY (season folders)
-        season_dirs = [d for d in os.listdir() if re.match(r'\d{4}-\d{4}', d) and os.path.isdir(d)]
+        # scandir entries know whether they are directories without an extra stat per entry
+        with os.scandir() as entries:
+            season_dirs = [e.name for e in entries if SEASON_DIR_RE.match(e.name) and e.is_dir()]
         if not season_dirs:
             return "matchups.json"  # Fall back to default if no season folders found
         
         # Get the most recent season
-        latest_season = sorted(season_dirs)[-1]
+        latest_season = max(season_dirs)
         
         # Get all week folders in that season
-        week_dirs = [d for d in os.listdir(latest_season) 
-                    if d.startswith("week-") and os.path.isdir(os.path.join(latest_season, d))]
+        with os.scandir(latest_season) as entries:
+            week_dirs = [e.name for e in entries if e.name.startswith("week-") and e.is_dir()]
         if not week_dirs:
             return "matchups.json"  # Fall back to default if no week folders found
         
-        # Get the most recent week
-        # Sort by week number (extract number from "week-X")
-        latest_week = sorted(week_dirs, key=lambda w: int(w.split("-")[1]))[-1]
+        # Get the most recent week by week number (extract number from "week-X")
+        latest_week = max(week_dirs, key=lambda w: int(w.rpartition("-")[2]))
         
         # Return the path to the matchups.json file
         return os.path.join(latest_season, latest_week, "matchups.json")
     except Exception as e:
-        log_event(f"Error finding default matchups path: {str(e)}")
+        logger.info("Error finding default matchups path: %s", e)
         return "matchups.json"  # Fall back to default
 
 def parse_expert_picks(matchup):
@@ -90,26 +97,24 @@ def parse_expert_picks(matchup):
     
     team_picks = matchup["expert_picks"]["team_picks"]
     
-    # Extract team names and pick counts
-    teams_and_picks = {}
+    # Track the most picked team and the total number of picks in a single pass
+    best_team, best_count, total_picks = None, -1, 0
     for team, picks_str in team_picks.items():
-        # Extract the number from strings like "7 Picks"
-        picks_count = int(re.search(r'(\d+)', picks_str).group(1))
-        teams_and_picks[team] = picks_count
+        # Extract the number from strings like "7 Picks", leading token first and the regex as fallback
+        count_str = picks_str.split(None, 1)[0] if picks_str.strip() else ""
+        picks_count = int(count_str) if count_str.isdigit() else int(PICK_COUNT_RE.search(picks_str).group(1))
+        total_picks += picks_count
+        # Strictly greater keeps the first team on ties, like max() did
+        if picks_count > best_count:
+            best_team, best_count = team, picks_count
     
-    if not teams_and_picks:
+    if best_team is None:
         return None, 0.0
     
-    # Find the team with the most picks
-    most_picked_team = max(teams_and_picks.items(), key=lambda x: x[1])
-    team_name = most_picked_team[0]
-    pick_count = most_picked_team[1]
-    
     # Calculate the percentage of experts picking this team
-    total_picks = sum(teams_and_picks.values())
-    percentage = pick_count / total_picks if total_picks > 0 else 0.0
+    percentage = best_count / total_picks if total_picks > 0 else 0.0
     
-    return team_name, percentage
+    return best_team, percentage
 
 def parse_spread(matchup):
     """
@@ -150,88 +155,113 @@ def predict_winner(matchup):
     away_team = matchup["away_team"]
     home_team = matchup["home_team"]
     
-    log_event(f"Analyzing matchup: {away_team} @ {home_team}")
+    logger.info("Analyzing matchup: %s @ %s", away_team, home_team)
     
     # Rule 1: Always pick the Seahawks
     if away_team == "SEAHAWKS":
-        log_event(f"✅ Picking {away_team} (User's favorite team)")
+        logger.info("✅ Picking %s (User's favorite team)", away_team)
         return away_team
     elif home_team == "SEAHAWKS":
-        log_event(f"✅ Picking {home_team} (User's favorite team)")
+        logger.info("✅ Picking %s (User's favorite team)", home_team)
         return home_team
     
     # Get expert consensus
     expert_pick, expert_percentage = parse_expert_picks(matchup)
-    log_event(f"Expert consensus: {expert_percentage:.1%} for {expert_pick if expert_pick else 'None'}")
+    logger.info("Expert consensus: %.1f%% for %s", expert_percentage * 100, expert_pick or "None")
     
     # Get spread information
     spread_favorite, spread_value = parse_spread(matchup)
-    log_event(f"Spread favorite: {spread_favorite if spread_favorite else 'None'} by {spread_value} points")
+    logger.info("Spread favorite: %s by %s points", spread_favorite or "None", spread_value)
     
     # Rule 2: Favorite teams with reasonable spread (PRIORITIZED OVER EXPERT CONSENSUS)
-    for team in FAVORITE_TEAMS:
-        if away_team == team:
-            # If away team is a favorite and either favored by spread or underdog by reasonable amount
-            if not spread_favorite or spread_favorite == away_team or spread_value <= REASONABLE_SPREAD:
-                log_event(f"✅ Picking {away_team} (User's preferred team with reasonable spread)")
-                return away_team
-        elif home_team == team:
-            # If home team is a favorite and either favored by spread or underdog by reasonable amount
-            if not spread_favorite or spread_favorite == home_team or spread_value <= REASONABLE_SPREAD:
-                log_event(f"✅ Picking {home_team} (User's preferred team with reasonable spread)")
-                return home_team
+    # When both teams are favorites, the one higher in FAVORITE_TEAMS is considered first
+    favorites = sorted((team for team in (away_team, home_team) if team in FAVORITE_RANK), key=FAVORITE_RANK.get)
+    for team in favorites:
+        # Pick a favorite team if it is either favored by spread or underdog by reasonable amount
+        if not spread_favorite or spread_favorite == team or spread_value <= REASONABLE_SPREAD:
+            logger.info("✅ Picking %s (User's preferred team with reasonable spread)", team)
+            return team
     
     # Rule 3: Strong expert consensus (>75%) - NOW LOWER PRIORITY THAN FAVORITE TEAMS
     if expert_pick and expert_percentage >= STRONG_EXPERT_CONSENSUS:
-        log_event(f"✅ Picking {expert_pick} (Strong expert consensus: {expert_percentage:.1%})")
+        logger.info("✅ Picking %s (Strong expert consensus: %.1f%%)", expert_pick, expert_percentage * 100)
         return expert_pick
     
     # Rule 4: Go with the spread favorite
     if spread_favorite:
-        log_event(f"✅ Picking {spread_favorite} (Favored by {spread_value} points)")
+        logger.info("✅ Picking %s (Favored by %s points)", spread_favorite, spread_value)
         return spread_favorite
     
     # Rule 5: Default to home team
-    log_event(f"✅ Picking {home_team} (Home field advantage)")
+    logger.info("✅ Picking %s (Home field advantage)", home_team)
     return home_team
 
 # Removed sorting function as we want to keep matchups in original order
 
-def predict_winners(matchups_path):
+def _prediction_cache_key(matchups_path):
+    """Modification times of the inputs that saved predictions were computed from"""
+    return {
+        "matchups_mtime_ns": os.stat(matchups_path).st_mtime_ns,
+        "rules_mtime_ns": os.stat(os.path.abspath(__file__)).st_mtime_ns,
+    }
+
+def _read_prediction_cache(cache_path):
+    """Return the cache key saved next to my_picks.json, or None if there isn't a readable one"""
+    try:
+        with open(cache_path, 'rb') as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def predict_winners(matchups_path, force=False):
     """
     Predict winners for all matchups in the given JSON file
     and save predictions to a my_picks.json file in the same directory
+
+    Predictions are skipped when my_picks.json is already up to date with the
+    matchups file and these rules, unless force is set.
     """
     try:
+        output_dir = os.path.dirname(matchups_path)
+        output_path = os.path.join(output_dir, "my_picks.json")
+        cache_path = output_path + ".cache"
+        
+        # Reuse the saved predictions if neither the matchups nor the rules changed since
+        cache_key = _prediction_cache_key(matchups_path)
+        if not force and os.path.exists(output_path) and _read_prediction_cache(cache_path) == cache_key:
+            logger.info("Predictions in %s are up to date with %s", output_path, matchups_path)
+            print(f"\n✅ Predictions already up to date in {output_path}")
+            return True
+        
         # Load matchups from JSON file
-        with open(matchups_path, 'r') as f:
-            data = json.load(f)
+        with open(matchups_path, 'rb') as f:
+            data = json.loads(f.read())
         
         matchups = data.get("matchups", [])
         if not matchups:
-            log_event("No matchups found in the JSON file")
+            logger.info("No matchups found in the JSON file")
             return False
         
-        log_event(f"Loaded {len(matchups)} matchups from {matchups_path}")
+        logger.info("Loaded %d matchups from %s", len(matchups), matchups_path)
         
         # Keep matchups in original order (no sorting)
         
         # Predict winners for each matchup
         predictions = []
         for i, matchup in enumerate(matchups):
-            log_event(f"\nProcessing matchup {i+1} of {len(matchups)}")
+            logger.info("\nProcessing matchup %d of %d", i + 1, len(matchups))
             winner = predict_winner(matchup)
             predictions.append(winner)
-            log_event(f"Prediction for {matchup['away_team']} @ {matchup['home_team']}: {winner}")
+            logger.info("Prediction for %s @ %s: %s", matchup['away_team'], matchup['home_team'], winner)
         
         # Save predictions to my_picks.json in the same directory as the input file
-        output_dir = os.path.dirname(matchups_path)
-        output_path = os.path.join(output_dir, "my_picks.json")
-        
-        with open(output_path, 'w') as f:
-            json.dump(predictions, f)
+        # Encode once and write the bytes directly, skipping the text-mode encoding layer
+        with open(output_path, 'wb') as f:
+            f.write(json.dumps(predictions, ensure_ascii=False).encode('utf-8'))
+        with open(cache_path, 'w') as f:
+            f.write(json.dumps(cache_key))
         
-        log_event(f"Saved {len(predictions)} predictions to {output_path}")
+        logger.info("Saved %d predictions to %s", len(predictions), output_path)
         print(f"\n✅ Predictions saved to {output_path}")
         
         # Print the predictions
@@ -246,30 +276,31 @@ def predict_winners(matchups_path):
         return True
     
     except Exception as e:
-        log_event(f"Error predicting winners: {str(e)}")
+        logger.info("Error predicting winners: %s", e)
         import traceback
-        log_event(traceback.format_exc())
+        logger.info(traceback.format_exc())
         return False
 
 def main():
     """Main function to run the script"""
     parser = argparse.ArgumentParser(description='Predict NFL game winners based on expert picks and user preferences')
     parser.add_argument('matchups_path', nargs='?', default=None, help='Path to the matchups.json file')
+    parser.add_argument('--force', action='store_true', help='Recompute predictions even if my_picks.json is up to date')
     args = parser.parse_args()
     
     # If no path is provided, use the default path
     if not args.matchups_path:
         args.matchups_path = get_default_matchups_path()
-        log_event(f"No path provided, using default path: {args.matchups_path}")
+        logger.info("No path provided, using default path: %s", args.matchups_path)
     
     # Check if the file exists
     if not os.path.exists(args.matchups_path):
-        log_event(f"Error: File not found: {args.matchups_path}")
+        logger.info("Error: File not found: %s", args.matchups_path)
         print(f"Error: File not found: {args.matchups_path}")
         return False
     
     # Predict winners
-    return predict_winners(args.matchups_path)
+    return predict_winners(args.matchups_path, force=args.force)
 
 if __name__ == "__main__":
     main()
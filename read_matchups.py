@@ -1,467 +1,670 @@
-from playwright.sync_api import sync_playwright
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+import argparse
+import functools
 import logging
 import re
-from datetime import datetime, timedelta
 import time
+from datetime import datetime, timedelta
+import asyncio
 import json
 import os
+import sys
 import traceback
 from dotenv import load_dotenv
+from driver import BLOCKED_RESOURCE_TYPES, BLOCKED_HOSTS, ROWS_SETTLED_JS, ROWS_SETTLED_POLL_MS, STORAGE_STATE_PATH
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Set up logging
+# PW_DEBUG=1 shows the browser, slows it down, turns on the progress log and logs page traffic
+DEBUG = bool(os.getenv("PW_DEBUG"))
+
+# Set up logging; warnings and errors always show, the per-matchup progress lines only when debugging
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.WARNING,
     format='%(asctime)s - %(levelname)s - %(message)s',
     datefmt='%H:%M:%S'
 )
 logger = logging.getLogger('playwright_debug')
+logger.setLevel(logging.DEBUG if DEBUG else logging.WARNING)
+
+# Each matchup row on the picks page
+MATCHUP_SELECTOR = 'div.MuiBox-root div.MuiStack-root[data-cy]'
+
+# True once at least the given number of matchup rows are on the page
+ROWS_AT_LEAST_JS = "([selector, count]) => document.querySelectorAll(selector).length >= count"
+
+# Reads one matchup row: game time (Thu @ 5:20 PM), network, both teams with their
+# records, and which side is selected; missing texts come back as placeholders
+MATCHUP_ROW_JS = """row => {
+    const text = (selector, missing) => {
+        const el = row.querySelector(selector);
+        return el ? el.innerText.trim() : missing;
+    };
+    return {
+        gameTime: text('h6.MuiTypography-subtitle2', 'Time not found'),
+        network: text('div.MuiBox-root h6.MuiTypography-subtitle2:nth-child(3)', ''),
+        awayTeam: text('div.MuiStack-root.left-side h3.MuiTypography-h3', 'Team not found'),
+        awayRecord: text('div.MuiStack-root.left-side span.MuiTypography-misc', 'Record not found'),
+        homeTeam: text('div.MuiStack-root.right-side h3.MuiTypography-h3', 'Team not found'),
+        homeRecord: text('div.MuiStack-root.right-side span.MuiTypography-misc', 'Record not found'),
+        awaySelected: row.querySelector('div.MuiStack-root.left-side.item-selected') !== null,
+        homeSelected: row.querySelector('div.MuiStack-root.right-side.item-selected') !== null,
+    };
+}"""
+
+# Matchup Analysis button inside a matchup row, and the X that closes its popup
+ANALYSIS_BUTTON_SELECTOR = 'button[data-cy="matchup-analysis"]'
+POPUP_CLOSE_SELECTOR = 'svg.MuiSvgIcon-root[viewBox="0 0 24 24"] path[d^="M18.3 5.7"]'
+
+# Odds section of an open popup; gone once the popup has closed
+ODDS_SECTION_SELECTOR = 'div.MuiStack-root.latest-odds'
+
+# Element wrapping an open popup; the popup's sections are only looked up inside it
+POPUP_ROOT_SELECTOR = 'div[role="dialog"], div.MuiModal-root'
+
+# Team columns and offense/defense sections of the popup's Matchup section
+STATS_TEAM_SELECTOR = 'div.MuiStack-root.mui-style-1i67s9, div.MuiStack-root.mui-style-1sqwbr3'
+STATS_SECTION_SELECTOR = 'div.MuiStack-root.mui-style-10p98jm'
+
+# Pages scraping matchup analysis popups at the same time
+MAX_WORKERS = int(os.getenv("READ_MATCHUPS_WORKERS", "4"))
+
+# Browser profile kept between runs so the HTTP cache and session stay warm
+PROFILE_DIR = "cbs_profile"
+
+# Touched inside the profile whenever it is seeded from cbs_storage.json
+PROFILE_SEED_MARKER = os.path.join(PROFILE_DIR, "seeded_from_storage")
+
+# Appended to the matchups JSON path for the in-progress checkpoint file
+CHECKPOINT_SUFFIX = ".partial.jsonl"
+
+# READ_MATCHUPS_CACHE_TTL=<seconds> keeps each popup's analysis in POPUP_CACHE_DIR for that
+# long so development reruns skip the popups; off (0) by default
+POPUP_CACHE_TTL = int(os.getenv("READ_MATCHUPS_CACHE_TTL", "0"))
+POPUP_CACHE_DIR = os.path.join(".cache", "popups")
+
+# READ_MATCHUPS_SAVED_TTL=<seconds> is how long analysis saved by an earlier run (judged by each matchup's
+# analyzed_at) is reused instead of re-read, so odds and expert picks don't go stale; 6 hours by default
+SAVED_ANALYSIS_TTL = int(os.getenv("READ_MATCHUPS_SAVED_TTL", str(6 * 60 * 60)))
+
+# Matchup fields read from the analysis popup, reused from an earlier run when possible;
+# analyzed_at is when the popup was actually read and is carried over unchanged on reuse
+ANALYSIS_KEYS = ('odds', 'expert_picks', 'matchup_stats', 'analyzed_at')
+
+# Team code in a CBS logo URL, e.g. .../logos/team/417.svg
+TEAM_URL_RE = re.compile(r'team/([^.]+)')
+
+# CBS team code -> team name
+TEAM_CODES = {
+    '404': 'CARDINALS',
+    '405': 'FALCONS',
+    '406': 'RAVENS',
+    '407': 'BILLS',
+    '408': 'PANTHERS',
+    '409': 'BEARS',
+    '410': 'BENGALS',
+    '411': 'COWBOYS',
+    '412': 'BRONCOS',
+    '413': 'LIONS',
+    '414': 'PACKERS',
+    '415': 'COLTS',
+    '416': 'JAGUARS',
+    '417': 'CHIEFS',
+    '418': 'DOLPHINS',
+    '419': 'VIKINGS',
+    '420': 'PATRIOTS',
+    '421': 'SAINTS',
+    '422': 'GIANTS',
+    '423': 'JETS',
+    '424': 'RAIDERS',
+    '425': 'EAGLES',
+    '426': 'STEELERS',
+    '427': 'RAMS',
+    '428': 'CHARGERS',
+    '429': '49ERS',
+    '430': 'SEAHAWKS',
+    '431': 'BUCCANEERS',
+    '432': 'TITANS',
+    '433': 'COMMANDERS',
+    '434': 'BROWNS',
+    '247415': 'TEXANS',
+}
+
+# Reads the odds section of a matchup analysis popup: the two team labels, the
+# [first, second] texts of each of the six odds boxes, and the opening odds texts
+ODDS_JS = """root => {
+    const text = el => el ? el.innerText.trim() : '';
+    const teamOdds = [...root.querySelectorAll('div.MuiStack-root.latest-odds div.MuiStack-root div.MuiStack-root p.MuiTypography-body1')].map(text);
+    const boxes = [...root.querySelectorAll('div.MuiStack-root.latest-odds div.MuiBox-root.mui-style-1wwjoop')].map(box => [
+        text(box.querySelector('p.MuiTypography-body1')),
+        text(box.querySelector('p.MuiTypography-body1 + p.MuiTypography-body1')),
+    ]);
+    const opening = root.querySelector('div.MuiStack-root.table-footer div.MuiStack-root');
+    const openingTexts = opening ? [...opening.querySelectorAll('p.MuiTypography-body1')].map(text) : [];
+    return {teamOdds, boxes, openingTexts};
+}"""
+
+# Reads the expert picks section of a matchup analysis popup: the per-team pick counts
+# with their logo URLs, and each expert; missing elements come back as null
+EXPERT_PICKS_JS = """root => {
+    const text = el => el ? el.innerText.trim() : '';
+    const src = img => img ? (img.getAttribute('src') || '') : null;
+    const headers = [...root.querySelectorAll('div.MuiStack-root h3')]
+        .filter(h => h.innerText.trim().toLowerCase().includes('expert picks'));
+    const teams = headers.flatMap(h => {
+        const next = h.nextElementSibling;
+        return next && next.matches('div.MuiStack-root') ? [...next.children].filter(c => c.matches('div.MuiStack-root')) : [];
+    }).map(team => {
+        const picks = team.querySelector('p.MuiTypography-body1');
+        return {img: src(team.querySelector('div.MuiAvatar-root img')), picks: picks ? text(picks) : null};
+    });
+    const experts = [...root.querySelectorAll('div.MuiTabs-list div.MuiStack-root[id^="expert-"]')].map(expert => {
+        const name = expert.querySelector('h6.MuiTypography-subtitle1');
+        return {
+            name: name ? text(name) : null,
+            role: text(expert.querySelector('span.MuiTypography-misc')),
+            record: text(expert.querySelector('span.MuiTypography-menu')),
+            pick: text(expert.querySelector('div.MuiStack-root span.MuiTypography-misc')),
+            pickImg: src(expert.querySelector('div.MuiStack-root div.MuiAvatar-root img')),
+        };
+    });
+    return {teams, experts};
+}"""
+
+# True once an opened matchup analysis popup has rendered all three sections:
+# odds values, the Expert Picks heading and the Matchup heading
+POPUP_READY_JS = """() => {
+    const odds = document.querySelector('div.MuiStack-root.latest-odds p.MuiTypography-body1');
+    if (odds === null || odds.innerText.trim() === '') return false;
+    const root = odds.closest('""" + POPUP_ROOT_SELECTOR + """') || document;
+    const headings = [...root.querySelectorAll('div.MuiStack-root h3')].map(h => h.innerText.trim().toLowerCase());
+    return headings.some(h => h.includes('expert picks')) && headings.some(h => h.includes('matchup'));
+}"""
 
-def log_event(message):
-    logger.info(message)
+# Reads the popup's Matchup section: the two team logo URLs (null unless all four team
+# columns are there) and, for the first two offense/defense sections, each stat row
+# e.g. "Total Yds" with each team's rank and value; rows without a stat name are skipped
+MATCHUP_STATS_JS = """root => {
+    const text = el => el ? el.innerText.trim() : '';
+    const src = img => img ? img.getAttribute('src') : null;
+    const side = cell => ({
+        rank: text(cell && cell.querySelector('*:first-child')),
+        value: text(cell && cell.querySelector('p.MuiTypography-body2')),
+    });
+    const teams = [...root.querySelectorAll('""" + STATS_TEAM_SELECTOR + """')];
+    const sections = [...root.querySelectorAll('""" + STATS_SECTION_SELECTOR + """')].slice(0, 2);
+    return {
+        teamImgs: teams.length >= 4 ? teams.slice(0, 2).map(team => src(team.querySelector('div.MuiAvatar-root img'))) : null,
+        sections: sections.map(section => [...section.querySelectorAll('div.MuiStack-root.mui-style-13na5pa')]
+            .filter(row => row.querySelector('p.MuiTypography-body1'))
+            .map(row => ({
+                name: text(row.querySelector('p.MuiTypography-body1')),
+                team1: side(row.querySelector('div.MuiStack-root:first-child')),
+                team2: side(row.querySelector('div.MuiStack-root:last-child')),
+            }))),
+    };
+}"""
+
+# All three sections of an open matchup analysis popup in a single round trip, each read
+# from inside the popup element (the whole document if it has no dialog wrapper)
+POPUP_JS = """() => {
+    const odds = document.querySelector('""" + ODDS_SECTION_SELECTOR + """');
+    const root = (odds && odds.closest('""" + POPUP_ROOT_SELECTOR + """')) || document;
+    return {
+        odds: (""" + ODDS_JS + """)(root),
+        expertPicks: (""" + EXPERT_PICKS_JS + """)(root),
+        matchupStats: (""" + MATCHUP_STATS_JS + """)(root),
+    };
+}"""
+
+def log_event(message, *args):
+    """Log progress at DEBUG; per-matchup calls pass their values as args so nothing is formatted when DEBUG is off"""
+    logger.debug(message, *args)
+
+async def block_nonessential(route):
+    """Abort images, fonts, media, stylesheets and ad requests; let everything else through
+
+    Logo img src attributes are still set from the HTML, so team names can be read without loading the images.
+    """
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+def _side_odds(spread_box, money_box, total_box):
+    """Shape one team's spread, money and total boxes into its current odds"""
+    return {
+        'spread': spread_box[0],
+        'spread_odds': spread_box[1],
+        'money': money_box[0],
+        'total': total_box[0],
+        'total_odds': total_box[1]
+    }
+
+def build_odds_data(odds):
+    """Shape the odds section read by ODDS_JS"""
+    odds_data = {}
+    
+    # Get team names from the odds section
+    if len(odds['teamOdds']) >= 2:
+        odds_data['away_team_odds'] = odds['teamOdds'][0]
+        odds_data['home_team_odds'] = odds['teamOdds'][1]
+    
+    # Current odds: spread, money and total boxes for the away team, then the home team
+    boxes = odds['boxes']
+    if len(boxes) >= 6:  # We expect 6 boxes for spread, money, total (away and home)
+        odds_data['current_odds'] = {
+            'away': _side_odds(*boxes[0:3]),
+            'home': _side_odds(*boxes[3:6])
+        }
+    
+    # Opening odds; skip the first text which is just the label "Opening"
+    opening_texts = odds['openingTexts']
+    if len(opening_texts) >= 3:
+        odds_data['opening_odds'] = {
+            'spread': opening_texts[1],
+            'total': opening_texts[2]
+        }
+    
+    return odds_data
+
+def build_expert_data(picks):
+    """Shape the expert picks section read by EXPERT_PICKS_JS; empty when the section is missing"""
+    if not picks['teams'] and not picks['experts']:
+        return {}
+    expert_data = {}
+    
+    # Team pick counts, naming teams from their logo URLs
+    team_picks = picks['teams']
+    if len(team_picks) >= 2 and all(team['img'] is not None and team['picks'] is not None for team in team_picks[:2]):
+        expert_data['team_picks'] = {
+            extract_team_name_from_url(team_picks[0]['img']): team_picks[0]['picks'],
+            extract_team_name_from_url(team_picks[1]['img']): team_picks[1]['picks']
+        }
+    
+    # Individual expert picks
+    expert_data['experts'] = [
+        {
+            'name': expert['name'],
+            'role': expert['role'],
+            'record': expert['record'],
+            'pick': expert['pick'],
+            'pick_team': extract_team_name_from_url(expert['pickImg'])
+        }
+        for expert in picks['experts']
+        if expert['name'] is not None and expert['pickImg'] is not None
+    ]
+    
+    return expert_data
 
-def extract_odds_data(page):
-    """Extract odds data from the matchup analysis popup"""
+def build_stats_data(stats):
+    """Shape the offense/defense matchup stats read by MATCHUP_STATS_JS"""
+    stats_data = {}
+    
+    # Team names from the Matchup section's team logos
+    team_imgs = stats['teamImgs']
+    if team_imgs and None not in team_imgs:
+        stats_data['teams'] = {
+            'team1': extract_team_name_from_url(team_imgs[0]),
+            'team2': extract_team_name_from_url(team_imgs[1])
+        }
+    
+    # First section is team1 offense vs team2 defense, second is team1 defense vs team2 offense
+    sections = [
+        {row['name']: {'team1': row['team1'], 'team2': row['team2']} for row in rows}
+        for rows in stats['sections']
+    ]
+    if len(sections) >= 2:
+        stats_data['offense_defense_stats'] = {
+            'team1_offense_vs_team2_defense': sections[0],
+            'team2_offense_vs_team1_defense': sections[1]
+        }
+    
+    return stats_data
+
+async def extract_popup_data(page):
+    """Read the odds, expert picks and matchup stats of the open analysis popup in one evaluate"""
     try:
-        log_event("Extracting odds data")
-        odds_data = {}
-        
-        # Wait for odds section to appear
-        page.wait_for_selector('div.MuiStack-root.latest-odds', timeout=5000)
-        
-        # Extract spread, money, and total odds
-        try:
-            # Get team names from the odds section
-            team_elements = page.query_selector_all('div.MuiStack-root.latest-odds div.MuiStack-root div.MuiStack-root p.MuiTypography-body1')
-            if len(team_elements) >= 2:
-                away_team_odds = team_elements[0].inner_text().strip()
-                home_team_odds = team_elements[1].inner_text().strip()
-                odds_data['away_team_odds'] = away_team_odds
-                odds_data['home_team_odds'] = home_team_odds
-        except Exception as e:
-            log_event(f"Error extracting team names from odds: {str(e)}")
-        
-        # Extract current odds
-        try:
-            odds_boxes = page.query_selector_all('div.MuiStack-root.latest-odds div.MuiBox-root.mui-style-1wwjoop')
-            
-            if len(odds_boxes) >= 6:  # We expect 6 boxes for spread, money, total (away and home)
-                # Away team odds
-                away_spread = odds_boxes[0].query_selector('p.MuiTypography-body1')
-                away_spread_odds = odds_boxes[0].query_selector('p.MuiTypography-body1 + p.MuiTypography-body1')
-                
-                away_money = odds_boxes[1].query_selector('p.MuiTypography-body1')
-                
-                away_total = odds_boxes[2].query_selector('p.MuiTypography-body1')
-                away_total_odds = odds_boxes[2].query_selector('p.MuiTypography-body1 + p.MuiTypography-body1')
-                
-                # Home team odds
-                home_spread = odds_boxes[3].query_selector('p.MuiTypography-body1')
-                home_spread_odds = odds_boxes[3].query_selector('p.MuiTypography-body1 + p.MuiTypography-body1')
-                
-                home_money = odds_boxes[4].query_selector('p.MuiTypography-body1')
-                
-                home_total = odds_boxes[5].query_selector('p.MuiTypography-body1')
-                home_total_odds = odds_boxes[5].query_selector('p.MuiTypography-body1 + p.MuiTypography-body1')
-                
-                odds_data['current_odds'] = {
-                    'away': {
-                        'spread': away_spread.inner_text().strip() if away_spread else '',
-                        'spread_odds': away_spread_odds.inner_text().strip() if away_spread_odds else '',
-                        'money': away_money.inner_text().strip() if away_money else '',
-                        'total': away_total.inner_text().strip() if away_total else '',
-                        'total_odds': away_total_odds.inner_text().strip() if away_total_odds else ''
-                    },
-                    'home': {
-                        'spread': home_spread.inner_text().strip() if home_spread else '',
-                        'spread_odds': home_spread_odds.inner_text().strip() if home_spread_odds else '',
-                        'money': home_money.inner_text().strip() if home_money else '',
-                        'total': home_total.inner_text().strip() if home_total else '',
-                        'total_odds': home_total_odds.inner_text().strip() if home_total_odds else ''
-                    }
-                }
-        except Exception as e:
-            log_event(f"Error extracting current odds: {str(e)}")
-        
-        # Extract opening odds
-        try:
-            opening_odds_element = page.query_selector('div.MuiStack-root.table-footer div.MuiStack-root')
-            if opening_odds_element:
-                opening_odds_texts = opening_odds_element.query_selector_all('p.MuiTypography-body1')
-                if len(opening_odds_texts) >= 3:
-                    # Skip the first element which is just the label "Opening"
-                    opening_spread = opening_odds_texts[1].inner_text().strip()
-                    opening_total = opening_odds_texts[2].inner_text().strip()
-                    
-                    odds_data['opening_odds'] = {
-                        'spread': opening_spread,
-                        'total': opening_total
-                    }
-        except Exception as e:
-            log_event(f"Error extracting opening odds: {str(e)}")
-            
-        return odds_data
+        log_event("Extracting matchup analysis data")
+        popup = await page.evaluate(POPUP_JS)
     except Exception as e:
-        log_event(f"Error extracting odds data: {str(e)}")
-        return {}
+        logger.warning(f"Error extracting matchup analysis data: {str(e)}")
+        return {}, {}, {}
+    
+    return build_odds_data(popup['odds']), build_expert_data(popup['expertPicks']), build_stats_data(popup['matchupStats'])
+
+@functools.lru_cache(maxsize=64)
+def extract_team_name_from_url(url):
+    """Extract team name from image URL"""
+    if not url:
+        return ""
+    
+    # URLs are like: https://sports.cbsimg.net/fly/images/nfl/logos/team/417.svg
+    match = TEAM_URL_RE.search(url)
+    if match:
+        return get_team_name_from_code(match.group(1))
+    return ""
+
+def get_team_name_from_code(code):
+    """Map team code to team name"""
+    return TEAM_CODES.get(code, f"TEAM-{code}")
 
-def extract_expert_picks(page):
-    """Extract expert picks data from the matchup analysis popup"""
+
+async def extract_matchup_analysis(page, container, matchup_data, close_button):
+    """Open a matchup's analysis popup, add its odds, expert picks and stats to matchup_data, and close it
+
+    close_button is the page's popup close locator, created once per page and reused for every matchup.
+    """
+    away_team = matchup_data['away_team']
+    home_team = matchup_data['home_team']
     try:
-        log_event("Extracting expert picks data")
-        expert_data = {}
-        
-        # Wait for expert picks section to appear
-        page.wait_for_selector('div.MuiStack-root h3.MuiTypography-h3:text("Expert Picks")', timeout=5000)
-        
-        # Extract team pick counts
-        try:
-            team_picks = page.query_selector_all('div.MuiStack-root h3:text("Expert Picks") + div.MuiStack-root > div.MuiStack-root')
+        # Find and click the Matchup Analysis button
+        analysis_button = await container.query_selector(ANALYSIS_BUTTON_SELECTOR)
+        if analysis_button:
+            log_event("Clicking Matchup Analysis button for %s @ %s", away_team, home_team)
+            await analysis_button.click()
             
-            if len(team_picks) >= 2:
-                # First team
-                team1_img = team_picks[0].query_selector('div.MuiAvatar-root img')
-                team1_picks = team_picks[0].query_selector('p.MuiTypography-body1')
-                
-                # Second team
-                team2_img = team_picks[1].query_selector('div.MuiAvatar-root img')
-                team2_picks = team_picks[1].query_selector('p.MuiTypography-body1')
-                
-                if team1_img and team1_picks and team2_img and team2_picks:
-                    # Extract team names from image URLs
-                    team1_src = team1_img.get_attribute('src')
-                    team2_src = team2_img.get_attribute('src')
-                    
-                    team1_name = extract_team_name_from_url(team1_src)
-                    team2_name = extract_team_name_from_url(team2_src)
-                    
-                    team1_pick_count = team1_picks.inner_text().strip()
-                    team2_pick_count = team2_picks.inner_text().strip()
-                    
-                    expert_data['team_picks'] = {
-                        team1_name: team1_pick_count,
-                        team2_name: team2_pick_count
-                    }
-        except Exception as e:
-            log_event(f"Error extracting team pick counts: {str(e)}")
-        
-        # Extract individual expert picks
-        try:
-            expert_elements = page.query_selector_all('div.MuiTabs-list div.MuiStack-root[id^="expert-"]')
-            experts = []
+            # Wait once for every popup section to render, then read what is there
+            try:
+                await page.wait_for_function(POPUP_READY_JS, timeout=5000)
+            except PlaywrightTimeoutError:
+                logger.warning("Matchup analysis popup did not fully render, extracting what is there")
             
-            for expert_element in expert_elements:
-                expert_name = expert_element.query_selector('h6.MuiTypography-subtitle1')
-                expert_role = expert_element.query_selector('span.MuiTypography-misc')
-                expert_record = expert_element.query_selector('span.MuiTypography-menu')
-                expert_pick_img = expert_element.query_selector('div.MuiStack-root div.MuiAvatar-root img')
-                expert_pick_text = expert_element.query_selector('div.MuiStack-root span.MuiTypography-misc')
-                
-                if expert_name and expert_pick_img:
-                    expert_info = {
-                        'name': expert_name.inner_text().strip(),
-                        'role': expert_role.inner_text().strip() if expert_role else '',
-                        'record': expert_record.inner_text().strip() if expert_record else '',
-                        'pick': expert_pick_text.inner_text().strip() if expert_pick_text else '',
-                        'pick_team': extract_team_name_from_url(expert_pick_img.get_attribute('src'))
-                    }
-                    experts.append(expert_info)
+            # Read all three sections at once
+            odds_data, expert_data, stats_data = await extract_popup_data(page)
+            matchup_data['analyzed_at'] = datetime.now().isoformat()
+            if odds_data:
+                matchup_data['odds'] = odds_data
+                log_event("Added odds data to matchup")
+            
+            if expert_data:
+                matchup_data['expert_picks'] = expert_data
+                log_event("Added expert picks data to matchup")
             
-            expert_data['experts'] = experts
-        except Exception as e:
-            log_event(f"Error extracting individual expert picks: {str(e)}")
+            if stats_data:
+                matchup_data['matchup_stats'] = stats_data
+                log_event("Added matchup stats data to matchup")
             
-        return expert_data
+            # Close the popup by clicking the X button
+            log_event("Closing matchup analysis popup")
+            try:
+                await close_button.click(timeout=3000)
+            except PlaywrightTimeoutError:
+                logger.warning("Could not find close button for popup")
+            else:
+                # Wait for the popup to be removed before moving on to the next matchup
+                try:
+                    await page.wait_for_selector(ODDS_SECTION_SELECTOR, state='detached', timeout=3000)
+                except PlaywrightTimeoutError:
+                    logger.warning("Matchup analysis popup did not close in time")
+        else:
+            logger.warning("Could not find Matchup Analysis button for %s @ %s", away_team, home_team)
     except Exception as e:
-        log_event(f"Error extracting expert picks data: {str(e)}")
-        return {}
+        logger.warning(f"Error processing matchup analysis: {str(e)}")
+        log_event(traceback.format_exc())
+
+def get_popup_cache_path(game_time, away_team, home_team):
+    """Get the popup cache file for one matchup"""
+    name = re.sub(r'[^A-Za-z0-9]+', '_', f"{away_team}_at_{home_team}_{game_time}")
+    return os.path.join(POPUP_CACHE_DIR, name + ".json")
 
-def extract_matchup_stats(page):
-    """Extract offense/defense matchup stats from the matchup analysis popup"""
+def load_cached_popup(path):
+    """Return the analysis cached at path if it is younger than POPUP_CACHE_TTL, else None"""
+    if POPUP_CACHE_TTL <= 0:
+        return None
     try:
-        log_event("Extracting matchup stats data")
-        stats_data = {}
+        if time.time() - os.stat(path).st_mtime >= POPUP_CACHE_TTL:
+            return None
+        with open(path, 'rb') as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+def save_cached_popup(path, matchup_data):
+    """Cache the analysis fields of matchup_data at path when the popup cache is on"""
+    if POPUP_CACHE_TTL <= 0:
+        return
+    try:
+        os.makedirs(POPUP_CACHE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({key: matchup_data[key] for key in ANALYSIS_KEYS if key in matchup_data}, f)
+    except Exception as e:
+        logger.warning(f"Error writing popup cache: {str(e)}")
+
+def find_saved_analysis(existing, game_time, away_team, home_team):
+    """Return the analysis an earlier run saved for this matchup (or a recent development run
+    cached when READ_MATCHUPS_CACHE_TTL is set), or None when its popup has to be read"""
+    saved = existing.get((game_time, away_team, home_team)) if existing else None
+    return saved or load_cached_popup(get_popup_cache_path(game_time, away_team, home_team))
+
+async def extract_matchup(page, container, i, total, existing=None, close_button=None):
+    """Extract one matchup, including its analysis popup; returns None if its teams can't be read
+
+    existing maps (game_time, away_team, home_team) to matchups saved by an earlier run;
+    their analysis is reused instead of opening the popup again. close_button is the
+    page's popup close locator; one is created when it isn't passed.
+    """
+    try:
+        log_event("Processing matchup %d of %d", i + 1, total)
         
-        # Wait for matchup section to appear
-        page.wait_for_selector('div.MuiStack-root h3.MuiTypography-h3:text("Matchup")', timeout=5000)
+        # Read the row's time, network, teams, records and selection in one round trip
+        row = await container.evaluate(MATCHUP_ROW_JS)
+        game_time = row['gameTime']
+        network = row['network']
+        away_team = row['awayTeam']
+        away_record = row['awayRecord']
+        home_team = row['homeTeam']
+        home_record = row['homeRecord']
+        away_selected = row['awaySelected']
+        home_selected = row['homeSelected']
         
-        # Extract team names from matchup section
-        try:
-            team_sections = page.query_selector_all('div.MuiStack-root.mui-style-1i67s9, div.MuiStack-root.mui-style-1sqwbr3')
-            
-            if len(team_sections) >= 4:  # We expect 4 sections (2 for offense matchup, 2 for defense matchup)
-                team1_img = team_sections[0].query_selector('div.MuiAvatar-root img')
-                team2_img = team_sections[1].query_selector('div.MuiAvatar-root img')
-                
-                if team1_img and team2_img:
-                    team1_name = extract_team_name_from_url(team1_img.get_attribute('src'))
-                    team2_name = extract_team_name_from_url(team2_img.get_attribute('src'))
-                    
-                    stats_data['teams'] = {
-                        'team1': team1_name,
-                        'team2': team2_name
-                    }
-        except Exception as e:
-            log_event(f"Error extracting team names from matchup stats: {str(e)}")
+        # Determine which team was picked (if any)
+        picked_team = None
+        if away_selected:
+            picked_team = away_team
+            log_event("User picked: %s", away_team)
+        elif home_selected:
+            picked_team = home_team
+            log_event("User picked: %s", home_team)
         
-        # Extract offense vs defense stats
-        try:
-            # First matchup section (team1 offense vs team2 defense)
-            offense_defense_sections = page.query_selector_all('div.MuiStack-root.mui-style-10p98jm')
-            
-            if len(offense_defense_sections) >= 2:
-                # Process first section: team1 offense vs team2 defense
-                team1_offense_stats = extract_stats_from_section(offense_defense_sections[0])
-                
-                # Process second section: team1 defense vs team2 offense
-                team2_offense_stats = extract_stats_from_section(offense_defense_sections[1])
-                
-                stats_data['offense_defense_stats'] = {
-                    'team1_offense_vs_team2_defense': team1_offense_stats,
-                    'team2_offense_vs_team1_defense': team2_offense_stats
-                }
-        except Exception as e:
-            log_event(f"Error extracting offense/defense stats: {str(e)}")
-            
-        return stats_data
+        # Create the basic matchup data
+        matchup_data = {
+            'game_time': game_time,
+            'network': network,
+            'away_team': away_team,
+            'away_record': away_record,
+            'home_team': home_team,
+            'home_record': home_record,
+            'picked_team': picked_team
+        }
+        
+        # Reuse the analysis saved by an earlier run while the game and its kickoff are unchanged
+        saved = find_saved_analysis(existing, game_time, away_team, home_team)
+        if saved:
+            log_event("Reusing saved analysis for %s @ %s", away_team, home_team)
+            matchup_data.update({key: saved[key] for key in ANALYSIS_KEYS if key in saved})
+        else:
+            # Now click on the Matchup Analysis button to get additional data
+            if close_button is None:
+                close_button = page.locator(POPUP_CLOSE_SELECTOR).first
+            await extract_matchup_analysis(page, container, matchup_data, close_button)
+            save_cached_popup(get_popup_cache_path(game_time, away_team, home_team), matchup_data)
+        
+        # Only add if we have valid team names
+        if away_team != "Team not found" and home_team != "Team not found":
+            # Log the extraction with pick information
+            pick_info = " - Picked: " + picked_team if picked_team else ""
+            log_event("Extracted matchup: %s (%s) @ %s (%s) - %s on %s%s",
+                      away_team, away_record, home_team, home_record, game_time, network, pick_info)
+            return matchup_data
     except Exception as e:
-        log_event(f"Error extracting matchup stats data: {str(e)}")
-        return {}
+        logger.warning(f"Error extracting matchup details: {str(e)}")
+        log_event(traceback.format_exc())
+    return None
 
-def extract_stats_from_section(section):
-    """Helper function to extract stats from a matchup section"""
-    stats = {}
+async def seed_profile_cookies(context):
+    """Copy the cookies from cbs_storage.json into the persistent profile when login.py has saved newer ones"""
     try:
-        stat_rows = section.query_selector_all('div.MuiStack-root.mui-style-13na5pa')
-        
-        for row in stat_rows:
-            # Get the stat name (e.g., "Total Yds", "Passing Yds", etc.)
-            stat_name_element = row.query_selector('p.MuiTypography-body1')
-            if not stat_name_element:
-                continue
-                
-            stat_name = stat_name_element.inner_text().strip()
-            
-            # Get team1 rank and value
-            team1_element = row.query_selector('div.MuiStack-root:first-child')
-            team1_rank_elem = team1_element.query_selector('*:first-child') if team1_element else None
-            team1_rank = team1_rank_elem.inner_text().strip() if team1_rank_elem else ''
-            team1_value_elem = team1_element.query_selector('p.MuiTypography-body2') if team1_element else None
-            team1_value = team1_value_elem.inner_text().strip() if team1_value_elem else ''
-            
-            # Get team2 rank and value
-            team2_element = row.query_selector('div.MuiStack-root:last-child')
-            team2_rank_elem = team2_element.query_selector('*:first-child') if team2_element else None
-            team2_rank = team2_rank_elem.inner_text().strip() if team2_rank_elem else ''
-            team2_value_elem = team2_element.query_selector('p.MuiTypography-body2') if team2_element else None
-            team2_value = team2_value_elem.inner_text().strip() if team2_value_elem else ''
-            
-            stats[stat_name] = {
-                'team1': {
-                    'rank': team1_rank,
-                    'value': team1_value
-                },
-                'team2': {
-                    'rank': team2_rank,
-                    'value': team2_value
-                }
-            }
-    except Exception as e:
-        log_event(f"Error extracting stats from section: {str(e)}")
+        storage_mtime = os.stat(STORAGE_STATE_PATH).st_mtime
+    except FileNotFoundError:
+        log_event(f"No {STORAGE_STATE_PATH} found, using the profile's existing cookies")
+        return
     
-    return stats
-
-def extract_team_name_from_url(url):
-    """Extract team name from image URL"""
-    if not url:
-        return ""
+    if os.path.exists(PROFILE_SEED_MARKER) and os.stat(PROFILE_SEED_MARKER).st_mtime >= storage_mtime:
+        return
     
+    log_event(f"Seeding browser profile with cookies from {STORAGE_STATE_PATH}")
+    with open(STORAGE_STATE_PATH, 'rb') as f:
+        await context.add_cookies(json.loads(f.read())['cookies'])
+    with open(PROFILE_SEED_MARKER, 'w'):
+        pass
+
+async def open_pool_page(context, target_url):
+    """Open a page on the pool and wait for its matchups to appear"""
+    page = await context.new_page()
+    log_event(f"Navigating to: {target_url}")
     try:
-        # URLs are like: https://sports.cbsimg.net/fly/images/nfl/logos/team/417.svg
-        # We'll map the team code to a name in a separate function
-        match = re.search(r'team/([^.]+)', url)
-        if match:
-            team_code = match.group(1)
-            return get_team_name_from_code(team_code)
-        return ""
+        await page.goto(target_url)
+        await page.wait_for_selector(MATCHUP_SELECTOR, timeout=60000)
     except Exception:
-        return ""
-
-def get_team_name_from_code(code):
-    """Map team code to team name"""
-    team_codes = {
-        '404': 'CARDINALS',
-        '405': 'FALCONS',
-        '406': 'RAVENS',
-        '407': 'BILLS',
-        '408': 'PANTHERS',
-        '409': 'BEARS',
-        '410': 'BENGALS',
-        '411': 'COWBOYS',
-        '412': 'BRONCOS',
-        '413': 'LIONS',
-        '414': 'PACKERS',
-        '415': 'COLTS',
-        '416': 'JAGUARS',
-        '417': 'CHIEFS',
-        '418': 'DOLPHINS',
-        '419': 'VIKINGS',
-        '420': 'PATRIOTS',
-        '421': 'SAINTS',
-        '422': 'GIANTS',
-        '423': 'JETS',
-        '424': 'RAIDERS',
-        '425': 'EAGLES',
-        '426': 'STEELERS',
-        '427': 'RAMS',
-        '428': 'CHARGERS',
-        '429': '49ERS',
-        '430': 'SEAHAWKS',
-        '431': 'BUCCANEERS',
-        '432': 'TITANS',
-        '433': 'COMMANDERS',
-        '434': 'BROWNS',
-        '247415': 'TEXANS',
-    }
-    return team_codes.get(code, f"TEAM-{code}")
+        await page.close()
+        raise
+    return page
 
+async def extract_matchups(context, page, target_url, existing=None, checkpoint_path=None):
+    """Extract all matchups with detailed analysis, spreading them over MAX_WORKERS pages
 
-def extract_matchups(page):
-    """Extract all matchups from the page with detailed analysis"""
+    Each matchup is appended to checkpoint_path as soon as it is read, so an interrupted run can resume.
+    """
     log_event("Extracting matchups from the page")
     
-    # Wait for the page to load and matchups to appear
-    # Using the MuiBox-root selector that contains matchups
     try:
-        # Wait for content to load
-        page.wait_for_selector('div.MuiBox-root div.MuiStack-root[data-cy]', timeout=60000)
+        # Wait for the page to load and matchups to appear
+        # Using the MuiBox-root selector that contains matchups
+        await page.wait_for_selector(MATCHUP_SELECTOR, timeout=60000)
         
-        # Give a little extra time for everything to render
-        time.sleep(2)
+        # Count the matchup containers once the list stops growing; each worker resolves its own rows through a locator
+        try:
+            settled = await page.wait_for_function(ROWS_SETTLED_JS, arg=MATCHUP_SELECTOR, polling=ROWS_SETTLED_POLL_MS, timeout=15000)
+            total = await settled.json_value()
+        except PlaywrightTimeoutError:
+            logger.warning("Matchup rows were still changing, counting them anyway")
+            total = await page.locator(MATCHUP_SELECTOR).count()
+        log_event(f"Found {total} potential matchup containers")
         
-        # Get all matchup containers
-        matchup_containers = page.query_selector_all('div.MuiBox-root div.MuiStack-root[data-cy]')
-        log_event(f"Found {len(matchup_containers)} potential matchup containers")
+        # Each worker page opens one analysis popup at a time, so popups on different pages overlap;
+        # only rows without saved analysis open a popup, so only those need the extra pages
+        row_data = await page.locator(MATCHUP_SELECTOR).evaluate_all(f"rows => rows.map({MATCHUP_ROW_JS})")
+        needs_popup = sum(
+            1 for row in row_data
+            if not find_saved_analysis(existing, row['gameTime'], row['awayTeam'], row['homeTeam'])
+        )
+        worker_count = max(1, min(MAX_WORKERS, needs_popup))
         
-        matchups = []
+        # A worker page that fails to load just leaves its share to the pages that did
+        opened = await asyncio.gather(
+            *(open_pool_page(context, target_url) for _ in range(worker_count - 1)),
+            return_exceptions=True
+        )
+        extra_pages = [worker_page for worker_page in opened if not isinstance(worker_page, BaseException)]
+        if len(extra_pages) < len(opened):
+            logger.warning("%d of %d extra worker pages failed to load", len(opened) - len(extra_pages), len(opened))
+        log_event("%d of %d matchups need their analysis popup, reading them on %d pages",
+                  needs_popup, total, 1 + len(extra_pages))
         
-        for i, container in enumerate(matchup_containers):
-            try:
-                log_event(f"Processing matchup {i+1} of {len(matchup_containers)}")
-                
-                # Extract game time (Thu @ 5:20 PM)
-                game_time_element = container.query_selector('h6.MuiTypography-subtitle2')
-                game_time = game_time_element.inner_text().strip() if game_time_element else "Time not found"
-                
-                # Extract network (NBC, CBS, etc.)
-                network_element = container.query_selector('div.MuiBox-root h6.MuiTypography-subtitle2:nth-child(3)')
-                network = network_element.inner_text().strip() if network_element else ""
-                
-                # Extract away team (left side)
-                away_team_element = container.query_selector('div.MuiStack-root.left-side h3.MuiTypography-h3')
-                away_team = away_team_element.inner_text().strip() if away_team_element else "Team not found"
-                
-                # Extract away team record
-                away_record_element = container.query_selector('div.MuiStack-root.left-side span.MuiTypography-misc')
-                away_record = away_record_element.inner_text().strip() if away_record_element else "Record not found"
-                
-                # Extract home team (right side)
-                home_team_element = container.query_selector('div.MuiStack-root.right-side h3.MuiTypography-h3')
-                home_team = home_team_element.inner_text().strip() if home_team_element else "Team not found"
-                
-                # Extract home team record
-                home_record_element = container.query_selector('div.MuiStack-root.right-side span.MuiTypography-misc')
-                home_record = home_record_element.inner_text().strip() if home_record_element else "Record not found"
-                
-                # Check if either team is selected (has the item-selected class)
-                away_selected = container.query_selector('div.MuiStack-root.left-side.item-selected') is not None
-                home_selected = container.query_selector('div.MuiStack-root.right-side.item-selected') is not None
-                
-                # Determine which team was picked (if any)
-                picked_team = None
-                if away_selected:
-                    picked_team = away_team
-                    log_event(f"User picked: {away_team}")
-                elif home_selected:
-                    picked_team = home_team
-                    log_event(f"User picked: {home_team}")
-                
-                # Create the basic matchup data
-                matchup_data = {
-                    'game_time': game_time,
-                    'network': network,
-                    'away_team': away_team,
-                    'away_record': away_record,
-                    'home_team': home_team,
-                    'home_record': home_record,
-                    'picked_team': picked_team
-                }
-                
-                # Now click on the Matchup Analysis button to get additional data
+        pending = asyncio.Queue()
+        for i in range(total):
+            pending.put_nowait(i)
+        results = [None] * total
+        
+        # Indices some worker has read, so none can go missing without failing the run
+        done = set()
+        
+        async def worker(worker_page):
+            # A page that never renders every row leaves its share of the queue to the other pages
+            if worker_page is not page:
                 try:
-                    # Find and click the Matchup Analysis button
-                    analysis_button = container.query_selector('button[data-cy="matchup-analysis"]')
-                    if analysis_button:
-                        log_event(f"Clicking Matchup Analysis button for {away_team} @ {home_team}")
-                        analysis_button.click()
-                        
-                        # Wait for the popup to appear
-                        page.wait_for_selector('div.MuiStack-root.latest-odds, div.MuiStack-root h3:text("Expert Picks"), div.MuiStack-root h3:text("Matchup")', timeout=5000)
-                        
-                        # Give a little time for everything to load
-                        time.sleep(1)
-                        
-                        # Extract odds data
-                        odds_data = extract_odds_data(page)
-                        if odds_data:
-                            matchup_data['odds'] = odds_data
-                            log_event("Added odds data to matchup")
-                        
-                        # Extract expert picks
-                        expert_data = extract_expert_picks(page)
-                        if expert_data:
-                            matchup_data['expert_picks'] = expert_data
-                            log_event("Added expert picks data to matchup")
-                        
-                        # Extract matchup stats
-                        stats_data = extract_matchup_stats(page)
-                        if stats_data:
-                            matchup_data['matchup_stats'] = stats_data
-                            log_event("Added matchup stats data to matchup")
-                        
-                        # Close the popup by clicking the X button
-                        close_button = page.query_selector('svg.MuiSvgIcon-root[viewBox="0 0 24 24"] path[d^="M18.3 5.7"]')
-                        if close_button:
-                            log_event("Closing matchup analysis popup")
-                            close_button.click()
-                            time.sleep(0.5)  # Give time for popup to close
-                        else:
-                            log_event("Could not find close button for popup")
-                    else:
-                        log_event(f"Could not find Matchup Analysis button for {away_team} @ {home_team}")
-                except Exception as e:
-                    log_event(f"Error processing matchup analysis: {str(e)}")
-                    log_event(traceback.format_exc())
-                
-                # Only add if we have valid team names
-                if away_team != "Team not found" and home_team != "Team not found":
-                    matchups.append(matchup_data)
-                    
-                    # Log the extraction with pick information
-                    pick_info = f" - Picked: {picked_team}" if picked_team else ""
-                    log_event(f"Extracted matchup: {away_team} ({away_record}) @ {home_team} ({home_record}) - {game_time} on {network}{pick_info}")
-            except Exception as e:
-                log_event(f"Error extracting matchup details: {str(e)}")
-                log_event(traceback.format_exc())
+                    await worker_page.wait_for_function(ROWS_AT_LEAST_JS, arg=[MATCHUP_SELECTOR, total], timeout=30000)
+                except PlaywrightTimeoutError:
+                    logger.warning("A worker page never showed all %d matchups, leaving it idle", total)
+                    return
+            rows = worker_page.locator(MATCHUP_SELECTOR)
+            close_button = worker_page.locator(POPUP_CLOSE_SELECTOR).first
+            while True:
+                try:
+                    i = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                container = await rows.nth(i).element_handle()
+                results[i] = await extract_matchup(worker_page, container, i, total, existing, close_button)
+                done.add(i)
+                if results[i] and checkpoint_path:
+                    append_matchup_jsonl(results[i], checkpoint_path)
         
-        return matchups
+        await asyncio.gather(*(worker(worker_page) for worker_page in [page, *extra_pages]))
+        for worker_page in extra_pages:
+            await worker_page.close()
+        
+        missing = [i + 1 for i in range(total) if i not in done]
+        if missing:
+            raise RuntimeError(f"Matchups {missing} were never read")
+        
+        # Keep the page order, dropping matchups whose teams couldn't be read
+        return [matchup for matchup in results if matchup]
     except Exception as e:
-        log_event(f"Error during matchup extraction: {str(e)}")
+        logger.error(f"Error during matchup extraction: {str(e)}")
         log_event(traceback.format_exc())
         return []
 
+def get_checkpoint_path(output_path):
+    """Get the JSONL file matchups are appended to while a scrape is in progress"""
+    return output_path + CHECKPOINT_SUFFIX
+
+def append_matchup_jsonl(matchup, path):
+    """Append one extracted matchup to the checkpoint file as a single JSON line"""
+    try:
+        with open(path, 'a') as f:
+            f.write(json.dumps(matchup) + '\n')
+    except Exception as e:
+        logger.warning(f"Error writing matchup checkpoint: {str(e)}")
+
+def load_saved_matchups(filename, checkpoint_path=None):
+    """Return the matchups already saved in filename that have their analysis, keyed by (game_time, away_team, home_team)
+
+    Matchups in checkpoint_path, left by a run that stopped before saving, are included too.
+    Matchups whose analyzed_at is missing or older than SAVED_ANALYSIS_TTL are left out.
+    """
+    oldest = (datetime.now() - timedelta(seconds=SAVED_ANALYSIS_TTL)).isoformat()
+    matchups = []
+    try:
+        with open(filename, 'rb') as f:
+            matchups.extend(json.loads(f.read())['matchups'])
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Could not read saved matchups from {filename}: {str(e)}")
+    
+    if checkpoint_path:
+        try:
+            with open(checkpoint_path, 'rb') as f:
+                for line in f:
+                    try:
+                        matchups.append(json.loads(line))
+                    except ValueError:
+                        # A line cut short when the earlier run was interrupted
+                        continue
+        except FileNotFoundError:
+            pass
+    
+    # ISO timestamps from datetime.now() compare correctly as strings
+    return {
+        (m['game_time'], m['away_team'], m['home_team']): m
+        for m in matchups
+        if 'odds' in m and m.get('analyzed_at', '') >= oldest
+    }
+
 def get_current_nfl_season():
     """Determine the current NFL season based on the current date"""
     current_date = datetime.now()
@@ -544,7 +747,7 @@ def save_matchups_to_json(matchups, filename=None):
         log_event(f"Successfully saved {len(matchups)} matchups to {filename}")
         return True
     except Exception as e:
-        log_event(f"Error saving matchups to JSON: {str(e)}")
+        logger.error(f"Error saving matchups to JSON: {str(e)}")
         return False
 
 def print_matchups(matchups):
@@ -580,8 +783,11 @@ def print_matchups(matchups):
     
     print("\n")
 
-def main():
-    """Main function to run the script"""
+async def main(refresh=False):
+    """Main function to run the script
+
+    Unless refresh is set, matchups already saved for this week keep their analysis instead of being re-read.
+    """
     log_event("Starting script")
     
     try:
@@ -593,61 +799,84 @@ def main():
         log_event(f"Current NFL Season: {season}, Week: {week}")
         log_event(f"Output will be saved to: {output_path}")
         
-        with sync_playwright() as p:
-            log_event("Launching browser")
-            browser = p.chromium.launch(headless=False, slow_mo=200)
-            
-            log_event("Creating context with saved storage state")
-            context = browser.new_context(storage_state="cbs_storage.json")
+        checkpoint_path = get_checkpoint_path(output_path)
+        if refresh and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        existing = {} if refresh else load_saved_matchups(output_path, checkpoint_path)
+        if existing:
+            print(f"♻️  Reusing saved analysis for {len(existing)} matchups (pass --refresh to read them again)")
+        
+        async with async_playwright() as p:
+            log_event(f"Launching browser with persistent profile {PROFILE_DIR}")
+            # Headless with no artificial delay unless overridden for manual debugging
+            context = await p.chromium.launch_persistent_context(
+                PROFILE_DIR,
+                headless=os.getenv("PW_HEADLESS", "0" if DEBUG else "1") == "1",
+                slow_mo=int(os.getenv("PW_SLOWMO", "200" if DEBUG else "0"))
+            )
+            await seed_profile_cookies(context)
+            await context.route("**/*", block_nonessential)
             
-            # Create a new page without verbose network event listeners
-            page = context.new_page()
+            # A persistent context opens with one blank page already
+            page = context.pages[0] if context.pages else await context.new_page()
             
-            # Only log console errors which might be important
-            # page.on("console", lambda msg: log_event(f"Console {msg.type}: {msg.text}") if msg.type == "error" else None)
+            # Per-event listeners call back into Python for every subresource, so only attach them when debugging
+            if DEBUG:
+                context.on("request", lambda request: logger.info("Request: %s %s", request.method, request.url))
+                context.on("response", lambda response: logger.info("Response: %s %s", response.status, response.url))
+                context.on("console", lambda msg: logger.info("Console %s: %s", msg.type, msg.text) if msg.type == "error" else None)
             
             # Navigate to the CBS Sports Pickem pool URL from environment variables
             target_url = os.getenv("CBS_POOL_URL")
             if not target_url:
-                log_event("ERROR: CBS_POOL_URL environment variable not found")
+                logger.error("CBS_POOL_URL environment variable not found")
                 print("❌ Error: CBS_POOL_URL not found in .env file")
                 print("   Please make sure you have set CBS_POOL_URL in your .env file")
-                return
+                return 1
                 
             log_event(f"Navigating to: {target_url}")
-            page.goto(target_url)
+            await page.goto(target_url)
             
             # Extract matchups
-            matchups = extract_matchups(page)
+            matchups = await extract_matchups(context, page, target_url, existing, checkpoint_path)
             
             # Print matchups to console
             print_matchups(matchups)
             
-            # Save matchups to JSON file
-            if matchups:
-                if save_matchups_to_json(matchups, output_path):
-                    print(f"\n✅ Matchups saved to {output_path}")
-                else:
-                    print(f"\n❌ Failed to save matchups to {output_path}")
-            
             # Close the browser
             log_event("Closing browser")
-            browser.close()
+            await context.close()
+            
+            # Save matchups to JSON file; a run that read none of them has failed
+            if not matchups:
+                print("\n❌ No matchups were read. Check the logs for details.")
+                return 1
+            if not save_matchups_to_json(matchups, output_path):
+                print(f"\n❌ Failed to save matchups to {output_path}")
+                return 1
+            print(f"\n✅ Matchups saved to {output_path}")
+            # Everything in the checkpoint is in the saved file now
+            if os.path.exists(checkpoint_path):
+                os.remove(checkpoint_path)
+            return 0
             
     except Exception as e:
-        log_event(f"Error during script execution: {str(e)}")
+        logger.error(f"Error during script execution: {str(e)}")
         log_event(traceback.format_exc())
         print(f"\nError: {str(e)}\n")
         
         # Take a screenshot to help debug if page is available
         try:
             if 'page' in locals():
-                page.screenshot(path="error_screenshot.png")
+                await page.screenshot(path="error_screenshot.png")
                 log_event("Saved screenshot to error_screenshot.png")
                 print("Screenshot saved to error_screenshot.png for debugging")
         except Exception as screenshot_error:
-            log_event(f"Failed to take screenshot: {str(screenshot_error)}")
-            pass
+            logger.warning(f"Failed to take screenshot: {str(screenshot_error)}")
+        return 1
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Read this week's CBS Pickem matchups and their analysis")
+    parser.add_argument("--refresh", action="store_true", help="Re-read every analysis popup instead of reusing this week's saved matchups")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(refresh=args.refresh)))
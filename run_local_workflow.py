@@ -14,69 +14,180 @@ If authentication fails, it sends a macOS notification with instructions
 for reauthentication.
 """
 
+import argparse
+import atexit
+import fcntl
+import glob
 import os
+import queue
 import sys
+import shlex
 import subprocess
 import traceback
 import json
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 import logging
+import logging.handlers
 
 # Configure logging
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Log file writes happen on a background thread: records are queued here and
+# a listener thread hands them to the file handler, opened on the first record
+_log_queue = queue.SimpleQueue()
+_log_file_handler = logging.FileHandler('cbs_pickem_workflow.log', delay=True)
+_log_file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_file_handler, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# The queue handler keeps the bare message; the file handler adds the timestamp and level
+_log_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_log_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
+    format=LOG_FORMAT,
     handlers=[
         logging.StreamHandler(),
-        logging.FileHandler('cbs_pickem_workflow.log')
+        _log_queue_handler
     ]
 )
 logger = logging.getLogger(__name__)
 
+# Imported after logging is configured so their records go to the workflow log too
+from predict_winners import predict_winners
+from read_matchups import get_output_path
+
 # Constants
 COOKIE_FILE = "cbs_storage.json"
 REAUTH_INSTRUCTIONS = "REAUTH_INSTRUCTIONS.md"
 
+# A week's matchups.json saved less than this many seconds ago is used as is instead of reading CBS again
+MATCHUPS_MAX_AGE = int(os.getenv("MATCHUPS_MAX_AGE_MINUTES", "60")) * 60
+
+# Held for the whole run so a second scheduled run started meanwhile exits at once
+LOCK_FILE = ".workflow.lock"
+
+# Touched in the week folder when every step of a run succeeds; a later run the same day then has nothing to do
+DONE_SENTINEL_PREFIX = ".done_"
+
+
+# Open descriptor of LOCK_FILE while this process holds the lock
+_lock_fd = None
+
+# AppleScript showing one notification per (title, message, subtitle) triple in its arguments;
+# each -e adds one line of the script
+NOTIFY_SCRIPT = [
+    'on run argv',
+    '    repeat with i from 1 to (count of argv) by 3',
+    '        set theSubtitle to item (i + 2) of argv',
+    '        if theSubtitle is "" then',
+    '            display notification (item (i + 1) of argv) with title (item i of argv)',
+    '        else',
+    '            display notification (item (i + 1) of argv) with title (item i of argv) subtitle theSubtitle',
+    '        end if',
+    '    end repeat',
+    'end run',
+]
+NOTIFY_SCRIPT_ARGS = [arg for line in NOTIFY_SCRIPT for arg in ("-e", line)]
+
+# Notifications queued during the run, shown together by flush_notifications
+_pending_notifications = []
+
+# Last cookie check as ((mtime_ns, size), result), so an unchanged cookie file isn't parsed again
+_cookie_check_cache = None
+
+@dataclass(frozen=True)
+class WeekPaths:
+    """Files a workflow run reads and writes in one season/week folder."""
+    root: Path
+    matchups: Path
+    picks: Path
+    preview1: Path
+    preview2: Path
+    
+    @classmethod
+    def for_folder(cls, season_week_path):
+        root = Path(season_week_path)
+        return cls(
+            root=root,
+            matchups=root / "matchups.json",
+            picks=root / "my_picks.json",
+            preview1=root / "my_picks_1.png",
+            preview2=root / "my_picks_2.png"
+        )
+    
+    @property
+    def committed_files(self):
+        """The week files that get committed after a run."""
+        return (self.matchups, self.picks, self.preview1, self.preview2)
+
 def send_notification(title, message, subtitle=None, open_file=None):
-    """Send a macOS notification with optional file opening action."""
+    """Queue a macOS notification with optional file opening action; flush_notifications shows them."""
+    _pending_notifications.append((title, message, subtitle, open_file))
+
+def flush_notifications():
+    """Show every queued notification with a single osascript call, without waiting for it."""
+    if not _pending_notifications:
+        return
     try:
-        script_parts = [
-            'display notification',
-            f'"{message}"',
-            'with title',
-            f'"{title}"'
-        ]
-        
-        if subtitle:
-            script_parts.extend(['subtitle', f'"{subtitle}"'])
+        # Titles and messages are passed as arguments, so quotes in them can't break the script
+        notification_args = []
+        files_to_open = []
+        for title, message, subtitle, open_file in _pending_notifications:
+            notification_args.extend([title, message, subtitle or ""])
             
-        osascript_cmd = ["osascript", "-e", " ".join(script_parts)]
-        subprocess.run(osascript_cmd, check=True)
+            # If a file path is provided, open it
+            if open_file and os.path.exists(open_file) and open_file not in files_to_open:
+                files_to_open.append(open_file)
+        osascript_cmd = ["osascript"] + NOTIFY_SCRIPT_ARGS + notification_args
         
-        # If a file path is provided, open it
-        if open_file and os.path.exists(open_file):
-            subprocess.run(["open", open_file], check=True)
-            
-        logger.info(f"Notification sent: {title} - {message}")
+        # Notifications are advisory, so don't wait for them
+        subprocess.Popen(osascript_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        if files_to_open:
+            subprocess.Popen(["open"] + files_to_open, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        
+        for title, message, _, _ in _pending_notifications:
+            logger.info(f"Notification sent: {title} - {message}")
     except Exception as e:
         logger.error(f"Failed to send notification: {e}")
+    finally:
+        _pending_notifications.clear()
 
 def check_cookie_validity():
     """Check if the cookie file exists and is valid."""
-    if not os.path.exists(COOKIE_FILE):
+    global _cookie_check_cache
+    # One stat answers whether the file exists, whether it is empty and whether it changed
+    try:
+        st = os.stat(COOKIE_FILE)
+    except FileNotFoundError:
         logger.error(f"Cookie file {COOKIE_FILE} not found")
         return False
     
     # Check if the file is not empty
-    if os.path.getsize(COOKIE_FILE) == 0:
+    if st.st_size == 0:
         logger.error(f"Cookie file {COOKIE_FILE} is empty")
         return False
     
-    # Try to parse the JSON
+    # Reuse the last result while the file is unchanged
+    file_key = (st.st_mtime_ns, st.st_size)
+    if _cookie_check_cache is not None and _cookie_check_cache[0] == file_key:
+        return _cookie_check_cache[1]
+    
+    valid = _parse_cookie_file()
+    _cookie_check_cache = (file_key, valid)
+    return valid
+
+def _parse_cookie_file():
+    """Parse the cookie file and check that it holds at least one cookie."""
     try:
-        with open(COOKIE_FILE, 'r') as f:
-            cookie_data = json.load(f)
+        # Read the raw bytes in one call and let json decode them directly
+        with open(COOKIE_FILE, 'rb') as f:
+            cookie_data = json.loads(f.read())
         
         # Basic validation - check if it has cookies
         if not cookie_data.get('cookies'):
@@ -98,28 +209,41 @@ def check_cookie_validity():
         return False
 
 def run_command(command, description):
-    """Run a command and log its output."""
+    """Run a command, letting it write straight to this process's stdout and stderr."""
     logger.info(f"Running {description}...")
+    # Only pipe the output through Python when debug logging will actually record it
+    capture = logger.isEnabledFor(logging.DEBUG)
     try:
         result = subprocess.run(
             command,
             check=True,
-            capture_output=True,
-            text=True
+            capture_output=capture,
+            text=capture
         )
         logger.info(f"{description} completed successfully")
-        logger.debug(f"Output: {result.stdout}")
+        if capture:
+            logger.debug(f"Output: {result.stdout}")
         return True
     except subprocess.CalledProcessError as e:
         logger.error(f"{description} failed with exit code {e.returncode}")
-        logger.error(f"Error output: {e.stderr}")
+        if capture:
+            logger.error(f"Error output: {e.stderr}")
         return False
 
+def week_folder_sort_key(name):
+    """Sort key for week folders: week-N by N, after any other folder such as "offseason"."""
+    prefix, _, number = name.rpartition("-")
+    if prefix == "week" and number.isdigit():
+        return (1, int(number))
+    return (0, name)
+
 def get_current_season_week():
     """Get the current season/week folder by finding the most recent one."""
     try:
         # Find all season folders (format: YYYY-YYYY)
-        season_folders = [f for f in os.listdir() if os.path.isdir(f) and f.startswith("20")]
+        # scandir entries know whether they are directories without an extra stat per entry
+        with os.scandir() as entries:
+            season_folders = [e.name for e in entries if e.name.startswith("20") and e.is_dir()]
         
         if not season_folders:
             logger.error("No season folders found")
@@ -129,14 +253,15 @@ def get_current_season_week():
         latest_season = max(season_folders)
         
         # Find all week folders in the latest season
-        week_folders = [f for f in os.listdir(latest_season) if os.path.isdir(os.path.join(latest_season, f))]
+        with os.scandir(latest_season) as entries:
+            week_folders = [e.name for e in entries if e.is_dir()]
         
         if not week_folders:
             logger.error(f"No week folders found in {latest_season}")
             return None
             
-        # Get the latest week folder
-        latest_week = max(week_folders)
+        # Get the latest week folder, comparing week numbers so week-10 comes after week-9
+        latest_week = max(week_folders, key=week_folder_sort_key)
         
         season_week_path = os.path.join(latest_season, latest_week)
         logger.info(f"Current season/week folder: {season_week_path}")
@@ -145,12 +270,22 @@ def get_current_season_week():
         logger.error(f"Error determining current season/week: {e}")
         return None
 
-def commit_and_push_changes(season_week_path):
-    """Commit and push changes to GitHub."""
+def commit_and_push_changes(week):
+    """Commit and push changes to GitHub for the WeekPaths week."""
     try:
-        # Check if there are any changes to commit
+        # Find the week files that exist, with one directory listing instead of a stat each
+        with os.scandir(week.root) as entries:
+            present = {e.name for e in entries if e.is_file()}
+        files_to_add = [str(path) for path in week.committed_files if path.name in present]
+        
+        if not files_to_add:
+            logger.warning("No files to commit")
+            return True
+        
+        # Check if any of them changed; limiting status to these paths skips walking the whole worktree,
+        # and unlike git diff it also reports new, untracked files
         status_result = subprocess.run(
-            ["git", "status", "--porcelain"],
+            ["git", "status", "--porcelain", "--"] + files_to_add,
             capture_output=True,
             text=True,
             check=True
@@ -159,42 +294,19 @@ def commit_and_push_changes(season_week_path):
         if not status_result.stdout.strip():
             logger.info("No changes to commit")
             return True
-            
-        # Add the files
-        matchups_path = os.path.join(season_week_path, "matchups.json")
-        picks_path = os.path.join(season_week_path, "my_picks.json")
-        preview1_path = os.path.join(season_week_path, "my_picks_1.png")
-        preview2_path = os.path.join(season_week_path, "my_picks_2.png")
         
-        files_to_add = []
-        for file_path in [matchups_path, picks_path, preview1_path, preview2_path]:
-            if os.path.exists(file_path):
-                files_to_add.append(file_path)
-        
-        if not files_to_add:
-            logger.warning("No files to commit")
-            return True
-            
-        # Add files
-        add_result = subprocess.run(
-            ["git", "add"] + files_to_add,
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        # Commit changes
+        # Add, commit and push in one shell so git is launched from a single subprocess;
+        # && stops at the first git command that fails
         current_date = datetime.datetime.now().strftime("%Y-%m-%d")
-        commit_result = subprocess.run(
-            ["git", "commit", "-m", f"Auto-update picks for {season_week_path} on {current_date}"],
-            capture_output=True,
-            text=True,
-            check=True
+        commit_message = f"Auto-update picks for {week.root} on {current_date}"
+        git_script = (
+            f"git add -- {shlex.join(files_to_add)}"
+            f" && git commit -m {shlex.quote(commit_message)}"
+            " && git push"
         )
-        
-        # Push changes
-        push_result = subprocess.run(
-            ["git", "push"],
+        subprocess.run(
+            git_script,
+            shell=True,
             capture_output=True,
             text=True,
             check=True
@@ -210,11 +322,56 @@ def commit_and_push_changes(season_week_path):
         logger.error(f"Error in commit_and_push_changes: {e}")
         return False
 
-def main():
-    """Main workflow function."""
+def acquire_workflow_lock():
+    """Take the workflow lock without waiting; returns False if another run holds it."""
+    global _lock_fd
+    if _lock_fd is not None:
+        return True
+    fd = os.open(LOCK_FILE, os.O_CREAT | os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        return False
+    # Released when the process exits
+    _lock_fd = fd
+    return True
+
+def recently_read_matchups():
+    """Return this week's matchups.json if its timestamp is within MATCHUPS_MAX_AGE, or None."""
+    path = get_output_path()
+    try:
+        with open(path, 'rb') as f:
+            saved_at = datetime.datetime.fromisoformat(json.loads(f.read())['timestamp'])
+    except (OSError, ValueError, KeyError):
+        return None
+    if (datetime.datetime.now() - saved_at).total_seconds() < MATCHUPS_MAX_AGE:
+        return path
+    return None
+
+def done_sentinel_name():
+    """Name of the file marking that the workflow completed today."""
+    return f"{DONE_SENTINEL_PREFIX}{datetime.date.today().isoformat()}"
+
+def main(force=False):
+    """Main workflow function.
+
+    Returns 0 without doing anything if another run is in progress or, unless force is set,
+    if a run already completed today. Unless force is set, this week's matchups read within
+    MATCHUPS_MAX_AGE are not read again; with force, read_matchups.py re-reads every analysis too.
+    """
     try:
         logger.info("Starting CBS Pickem workflow")
         
+        if not acquire_workflow_lock():
+            logger.info("Another workflow run is in progress, exiting")
+            return 0
+        
+        # Any week folder marked done today means this is a repeated run
+        if not force and glob.glob(os.path.join("20*", "*", done_sentinel_name())):
+            logger.info("Workflow already completed today, exiting (pass --force to run it again)")
+            return 0
+        
         # Step 1: Check if cookie file is valid
         if not check_cookie_validity():
             logger.error("Authentication cookies are invalid or missing")
@@ -226,8 +383,11 @@ def main():
             )
             return 1
             
-        # Step 2: Read matchups
-        if not run_command(["python", "read_matchups.py"], "Read matchups"):
+        # Step 2: Read matchups, unless a run moments ago already did
+        fresh_matchups = None if force else recently_read_matchups()
+        if fresh_matchups:
+            logger.info(f"Skipping Read matchups, {fresh_matchups} was saved less than {MATCHUPS_MAX_AGE // 60} minutes ago")
+        elif not run_command(["python", "read_matchups.py", *(["--refresh"] if force else [])], "Read matchups"):
             send_notification(
                 "CBS Pickem Workflow Failed",
                 "Failed to read matchups from CBS",
@@ -245,10 +405,13 @@ def main():
                 "Check the logs for more information"
             )
             return 1
+        
+        # Every later step works with the files in this folder
+        week = WeekPaths.for_folder(season_week_path)
             
-        # Step 3: Predict winners
-        matchups_file = os.path.join(season_week_path, "matchups.json")
-        if not run_command(["python", "predict_winners.py", matchups_file], "Predict winners"):
+        # Step 3: Predict winners; pure Python, so it runs in this process instead of a new interpreter
+        logger.info("Running Predict winners...")
+        if not predict_winners(str(week.matchups)):
             send_notification(
                 "CBS Pickem Workflow Failed",
                 "Failed to predict winners",
@@ -256,9 +419,17 @@ def main():
             )
             return 1
             
-        # Step 4: Make picks
-        picks_file = os.path.join(season_week_path, "my_picks.json")
-        if not run_command(["python", "make_picks.py", picks_file], "Make picks"):
+        # Step 5 only needs my_picks.json, so render the social previews while step 4 submits the picks
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            previews_future = executor.submit(
+                run_command, ["python", "generate_social_previews.py", str(week.root)], "Generate social previews"
+            )
+            
+            # Step 4: Make picks
+            picks_made = run_command(["python", "make_picks.py", str(week.picks), "--yes"], "Make picks")
+            previews_generated = previews_future.result()
+        
+        if not picks_made:
             send_notification(
                 "CBS Pickem Workflow Failed",
                 "Failed to submit picks to CBS",
@@ -268,7 +439,7 @@ def main():
             return 1
             
         # Step 5: Generate social previews
-        if not run_command(["python", "generate_social_previews.py", season_week_path], "Generate social previews"):
+        if not previews_generated:
             send_notification(
                 "CBS Pickem Workflow Warning",
                 "Failed to generate social preview images",
@@ -277,21 +448,28 @@ def main():
             # Continue with the workflow even if preview generation fails
             
         # Step 6: Commit and push changes
-        if not commit_and_push_changes(season_week_path):
+        changes_pushed = commit_and_push_changes(week)
+        if not changes_pushed:
             send_notification(
                 "CBS Pickem Workflow Warning",
                 "Failed to commit and push changes to GitHub",
                 "Picks were submitted successfully, but GitHub update failed"
             )
             # Continue with the workflow even if GitHub push fails
+        
+        # Only a run where every step succeeded marks today done, so a later run retries the rest
+        if not (previews_generated and changes_pushed):
+            logger.warning("Picks were submitted but not every step succeeded; a later run today will try again")
+            return 0
             
         # Success notification
         send_notification(
             "CBS Pickem Workflow Completed",
-            f"Successfully submitted picks for {season_week_path}",
+            f"Successfully submitted picks for {week.root}",
             "All steps completed successfully"
         )
         
+        (week.root / done_sentinel_name()).touch()
         logger.info("Workflow completed successfully")
         return 0
         
@@ -307,4 +485,11 @@ def main():
         return 1
 
 if __name__ == "__main__":
-    sys.exit(main())
+    parser = argparse.ArgumentParser(description="Run the CBS Pickem workflow")
+    parser.add_argument("--force", action="store_true", help="Run even if the workflow already completed today, and read the matchups again even if they were just read")
+    args = parser.parse_args()
+    try:
+        exit_code = main(force=args.force)
+    finally:
+        flush_notifications()
+    sys.exit(exit_code)